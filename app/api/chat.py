@@ -1,88 +1,209 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..schemas.chat import ChatRequest, ChatResponse
+from ..schemas.chat import ChatRequest, ChatResponse, ChatJobResponse
 from ..models.chat import ChatSession, ChatMessage
 from ..models.user import Vendor
-from ..config.database import get_db
+from ..config.database import get_db, get_async_db, SessionLocal
 from ..utils.auth_utils import get_current_vendor
-from ..services.ai_agent import VendorGPTAgent
-import uuid
+from ..utils.pagination import keyset_page, page_size, set_next_cursor, split_page
+from ..services.ai_agent import get_agent
+from ..services.chat_history import get_or_create_session, save_user_message, save_bot_message, load_history
+from ..services.text_search import dialect_name
+from ..services.tasks import celery_app, chat_task_id, process_chat_message
+from celery.result import AsyncResult
+from typing import Any, AsyncIterator, Optional
+import asyncio
+import json
 
 router = APIRouter()
-agent = VendorGPTAgent()
+agent = get_agent()
 
 @router.post("/", response_model=ChatResponse)
-def chat_with_ai(
+async def chat_with_ai(
     payload: ChatRequest,
     current_vendor: Vendor = Depends(get_current_vendor),
     db: Session = Depends(get_db)
 ):
+    # Read before any commit expires the instance
+    vendor_id = current_vendor.id
     try:
-        # Get or create chat session
-        session = db.query(ChatSession).filter(
-            ChatSession.vendor_id == current_vendor.id,
-            ChatSession.status == "active"
-        ).first()
-        
-        if not session:
-            session = ChatSession(
-                vendor_id=current_vendor.id,
-                session_id=str(uuid.uuid4()),
-                status="active"
-            )
-            db.add(session)
-            db.commit()
-            db.refresh(session)
-        
-        # Save user message
-        user_message = ChatMessage(
-            session_id=session.id,
-            message_type="user",
-            message_content=payload.message,
-            is_processed=False
-        )
-        db.add(user_message)
-        db.commit()
+        # Blocking DB work runs on the threadpool; the LLM calls are awaited
+        session = await run_in_threadpool(get_or_create_session, db, vendor_id)
+        session_id = session.id
+        user_message = await run_in_threadpool(save_user_message, db, session_id, payload.message)
+        message_id = user_message.id
+        history = await run_in_threadpool(load_history, db, session_id, message_id)
         
         # Generate AI response
-        ai_response = agent.generate_response(
+        ai_response = await agent.agenerate_response(
             message=payload.message,
-            vendor_id=current_vendor.id,
+            vendor_id=vendor_id,
             language=payload.language or "english",
-            db=db
+            db=db,
+            history=history
         )
         
-        # Save bot message
-        bot_message = ChatMessage(
-            session_id=session.id,
-            message_type="bot",
-            message_content=ai_response.response,
-            extracted_requirements=str(ai_response.extracted_requirements),
-            suggested_products=str([p for p in ai_response.products]),
-            is_processed=True
-        )
-        db.add(bot_message)
-        db.commit()
+        await run_in_threadpool(save_bot_message, db, session_id, ai_response, message_id)
         
         return ai_response
         
     except Exception as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         print(f"Chat error: {e}")
         raise HTTPException(500, f"Chat processing failed: {str(e)}")
 
-@router.get("/history")
-def get_chat_history(
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# Replies still being generated, so the tasks are not garbage collected mid-run
+_pending_replies = set()
+
+async def _generate_reply(payload: ChatRequest, vendor_id: int, session_id: int, message_id: int,
+                          events: asyncio.Queue):
+    """Stream the agent's events into events and save the reply.
+
+    Runs as its own task so a client disconnecting mid-stream does not cancel
+    it: the reply is still generated and saved, and shows up in the history.
+    """
+    # The request's session can be closed once streaming starts, so the stream uses its own
+    db = SessionLocal()
+    try:
+        history = await run_in_threadpool(load_history, db, session_id, message_id)
+        async for event, data in agent.astream_response(
+            message=payload.message,
+            vendor_id=vendor_id,
+            language=payload.language or "english",
+            db=db,
+            history=history
+        ):
+            if event == "done":
+                # Persist before announcing completion
+                await run_in_threadpool(save_bot_message, db, session_id, data, message_id)
+                data = data.dict()
+            events.put_nowait((event, data))
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        print(f"Chat stream error: {e}")
+        events.put_nowait(("error", {"detail": f"Chat processing failed: {str(e)}"}))
+    finally:
+        events.put_nowait(None)
+        await run_in_threadpool(db.close)
+
+async def _chat_events(payload: ChatRequest, vendor_id: int, session_id: int, message_id: int) -> AsyncIterator[str]:
+    events: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(_generate_reply(payload, vendor_id, session_id, message_id, events))
+    _pending_replies.add(task)
+    task.add_done_callback(_pending_replies.discard)
+    while True:
+        item = await events.get()
+        if item is None:
+            return
+        yield _sse(*item)
+
+@router.post("/stream")
+async def stream_chat(
+    payload: ChatRequest,
+    current_vendor: Vendor = Depends(get_current_vendor),
+    db: Session = Depends(get_db)
+):
+    """Server-sent events: requirements, products, reply tokens, then done"""
+    vendor_id = current_vendor.id
+    try:
+        session = await run_in_threadpool(get_or_create_session, db, vendor_id)
+        session_id = session.id
+        user_message = await run_in_threadpool(save_user_message, db, session_id, payload.message)
+        message_id = user_message.id
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        print(f"Chat error: {e}")
+        raise HTTPException(500, f"Chat processing failed: {str(e)}")
+    
+    return StreamingResponse(
+        _chat_events(payload, vendor_id, session_id, message_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/jobs", response_model=ChatJobResponse, status_code=202)
+async def submit_chat_job(
+    payload: ChatRequest,
     current_vendor: Vendor = Depends(get_current_vendor),
     db: Session = Depends(get_db)
 ):
-    session = db.query(ChatSession).filter(
+    """Store the user message and queue the reply; poll GET /chat/jobs/{message_id} for it"""
+    vendor_id = current_vendor.id
+    try:
+        session = await run_in_threadpool(get_or_create_session, db, vendor_id)
+        user_message = await run_in_threadpool(save_user_message, db, session.id, payload.message)
+        message_id = user_message.id
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        print(f"Chat error: {e}")
+        raise HTTPException(500, f"Chat processing failed: {str(e)}")
+    
+    try:
+        # Publishing is blocking (and runs the task inline in eager mode)
+        await run_in_threadpool(
+            process_chat_message.apply_async,
+            args=[message_id, payload.language or "english"],
+            task_id=chat_task_id(message_id)
+        )
+    except Exception as e:
+        print(f"Chat job enqueue failed: {e}")
+        raise HTTPException(503, "Chat queue unavailable, please retry")
+    
+    return ChatJobResponse(message_id=message_id, status="queued")
+
+def _job_status(db: Session, vendor_id: int, message_id: int) -> ChatJobResponse:
+    message = db.query(ChatMessage).join(ChatSession).filter(
+        ChatMessage.id == message_id,
+        ChatMessage.message_type == "user",
+        ChatSession.vendor_id == vendor_id
+    ).first()
+    if not message:
+        raise HTTPException(404, "Chat message not found")
+    
+    result = AsyncResult(chat_task_id(message_id), app=celery_app)
+    state = result.state
+    if state == "SUCCESS":
+        return ChatJobResponse(message_id=message_id, status="completed", result=result.result)
+    if state == "FAILURE":
+        return ChatJobResponse(message_id=message_id, status="failed", detail=str(result.result))
+    return ChatJobResponse(message_id=message_id, status="pending" if state == "PENDING" else "processing")
+
+@router.get("/jobs/{message_id}", response_model=ChatJobResponse)
+async def get_chat_job(
+    message_id: int,
+    current_vendor: Vendor = Depends(get_current_vendor),
+    db: Session = Depends(get_db)
+):
+    return await run_in_threadpool(_job_status, db, current_vendor.id, message_id)
+
+@router.get("/history")
+async def get_chat_history(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    current_vendor: Vendor = Depends(get_current_vendor),
+    db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(select(ChatSession).where(
         ChatSession.vendor_id == current_vendor.id,
         ChatSession.status == "active"
-    ).first()
+    ))
+    session = result.scalars().first()
     
     if not session:
-        return {"messages": []}
+        return {"messages": [], "next_cursor": None}
     
-    messages = session.messages.order_by(ChatMessage.created_at).all()
-    return {"messages": messages}
+    # Pages walk back from the newest message; each page is returned oldest first
+    limit = page_size(limit)
+    query = select(ChatMessage).where(ChatMessage.session_id == session.id)
+    result = await db.execute(keyset_page(query, ChatMessage, cursor, limit, dialect_name(db)))
+    messages, next_cursor = split_page(result.scalars().all(), limit)
+    set_next_cursor(response, next_cursor)
+    return {"messages": list(reversed(messages)), "next_cursor": next_cursor}
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
-from ..schemas.order import OrderCreate, OrderUpdate, OrderResponse, OrderItemCreate
+from ..schemas.order import OrderCreate, OrderUpdate, OrderResponse, OrderItemCreate, CartCheckout, CartOrderResponse
 from ..models.order import Order, OrderItem
 from ..models.user import Vendor, Supplier
-from ..models.product import Product
-from ..config.database import get_db
+from ..config.database import get_db, get_async_db
+from ..services.inventory import ReservationError, create_reserved_order, create_cart_orders
+from ..services.text_search import dialect_name
 from ..utils.auth_utils import get_current_vendor, get_current_supplier, get_current_user_type
+from ..utils.pagination import keyset_page, page_size, set_next_cursor, split_page
 
 router = APIRouter()
 
@@ -18,84 +22,73 @@ def create_order(
     db: Session = Depends(get_db)
 ):
     try:
-        # Verify product exists and is available
-        product = db.query(Product).filter(Product.id == payload.product_id).first()
-        if not product:
-            raise HTTPException(404, "Product not found")
-        
-        if not product.is_available:
-            raise HTTPException(400, "Product is not available")
-        
-        if product.available_quantity < payload.quantity:
-            raise HTTPException(400, "Insufficient product quantity")
-        
-        # Calculate total amount
-        total_amount = product.price_per_unit * payload.quantity
-        
-        # Create order
-        order_data = payload.dict()
-        order_data.update({
-            'vendor_id': current_vendor.id,
-            'supplier_id': product.supplier_id,
-            'unit_price': product.price_per_unit,
-            'total_amount': total_amount,
-            'status': 'pending'
-        })
-        
-        order = Order(**order_data)
-        db.add(order)
-        db.commit()
-        db.refresh(order)
-        
-        # Update product quantity
-        product.available_quantity -= payload.quantity
-        db.commit()
-        
-        return order
-        
+        # Stock check, decrement and order insert commit together
+        return create_reserved_order(db, current_vendor.id, payload)
+    except ReservationError as e:
+        raise HTTPException(e.status_code, e.detail)
     except Exception as e:
-        db.rollback()
         raise HTTPException(500, f"Failed to create order: {str(e)}")
 
+@router.post("/cart", response_model=List[CartOrderResponse])
+def checkout_cart(
+    payload: CartCheckout,
+    current_vendor: Vendor = Depends(get_current_vendor),
+    db: Session = Depends(get_db)
+):
+    """Order many items at once: one order per supplier, all reserved together or none"""
+    try:
+        return create_cart_orders(db, current_vendor.id, payload)
+    except ReservationError as e:
+        raise HTTPException(e.status_code, e.detail)
+    except Exception as e:
+        raise HTTPException(500, f"Failed to create orders: {str(e)}")
+
 @router.get("/", response_model=List[OrderResponse])
-def get_orders(
+async def get_orders(
+    response: Response,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     current_user = Depends(get_current_user_type),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     user_type = current_user["type"]
     user = current_user["user"]
     
-    query = db.query(Order)
+    query = select(Order)
     
     if user_type == "vendor":
-        query = query.filter(Order.vendor_id == user.id)
+        query = query.where(Order.vendor_id == user.id)
     elif user_type == "supplier":
-        query = query.filter(Order.supplier_id == user.id)
+        query = query.where(Order.supplier_id == user.id)
     
     if status:
-        query = query.filter(Order.status == status)
+        query = query.where(Order.status == status)
     
-    orders = query.order_by(Order.created_at.desc()).all()
+    limit = page_size(limit)
+    result = await db.execute(keyset_page(query, Order, cursor, limit, dialect_name(db)))
+    orders, next_cursor = split_page(result.scalars().all(), limit)
+    set_next_cursor(response, next_cursor)
     return orders
 
 @router.get("/{order_id}", response_model=OrderResponse)
-def get_order(
+async def get_order(
     order_id: int,
     current_user = Depends(get_current_user_type),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     user = current_user["user"]
     user_type = current_user["type"]
     
-    query = db.query(Order).filter(Order.id == order_id)
+    query = select(Order).where(Order.id == order_id)
     
     if user_type == "vendor":
-        query = query.filter(Order.vendor_id == user.id)
+        query = query.where(Order.vendor_id == user.id)
     elif user_type == "supplier":
-        query = query.filter(Order.supplier_id == user.id)
+        query = query.where(Order.supplier_id == user.id)
     
-    order = query.first()
+    result = await db.execute(query)
+    order = result.scalars().first()
     if not order:
         raise HTTPException(404, "Order not found")
     
@@ -1,17 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, UploadFile, File
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ..schemas.product import ProductCreate, ProductUpdate, ProductResponse
+from ..schemas.product import ProductCreate, ProductUpdate, ProductResponse, ProductSearchResponse, ProductImportReport, ProductBulkUpdate
 from ..models.product import Product, ProductImage
 from ..models.user import Supplier
-from ..config.database import get_db
+from ..config.database import get_db, get_async_db
+from ..services.catalog import product_catalog
+from ..services.product_import import FORMATS, csv_rows, detect_format, import_products, index_products, ndjson_rows
+from ..services.product_index import product_index
+from ..services.product_updates import ProductUpdateError, update_products
+from ..services.text_search import contains, dialect_name, search_products
 from ..utils.auth_utils import get_current_supplier
+from ..utils.pagination import keyset_page, page_size, set_next_cursor, split_page
 
 router = APIRouter()
 
 @router.post("/", response_model=ProductResponse)
 def create_product(
     payload: ProductCreate,
+    background_tasks: BackgroundTasks,
     current_supplier: Supplier = Depends(get_current_supplier),
     db: Session = Depends(get_db)
 ):
@@ -23,45 +33,130 @@ def create_product(
         db.add(product)
         db.commit()
         db.refresh(product)
+        product_catalog.upsert_product(product)
+        background_tasks.add_task(
+            product_index.upsert_product, product.id, product_index.product_text(product)
+        )
         
         return product
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(409, "You already have a product with this name")
     except Exception as e:
         db.rollback()
         raise HTTPException(500, f"Failed to create product: {str(e)}")
 
+@router.post("/import", response_model=ProductImportReport)
+def import_product_file(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    current_supplier: Supplier = Depends(get_current_supplier),
+    db: Session = Depends(get_db)
+):
+    """Create or update products from a CSV or NDJSON file, matched by name"""
+    file_format = format or detect_format(file.filename, file.content_type)
+    if file_format not in FORMATS:
+        raise HTTPException(400, "Upload a .csv or .ndjson file, or pass format=csv|ndjson")
+
+    rows = csv_rows(file.file) if file_format == "csv" else ndjson_rows(file.file)
+    try:
+        report, product_ids = import_products(db, current_supplier, rows)
+    except UnicodeDecodeError:
+        raise HTTPException(400, "File must be UTF-8 encoded")
+
+    if product_ids:
+        background_tasks.add_task(index_products, product_ids)
+    return report
+
 @router.get("/", response_model=List[ProductResponse])
-def get_products(
+async def get_products(
+    response: Response,
     category: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     available_only: bool = True,
-    db: Session = Depends(get_db)
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Product)
+    limit = page_size(limit)
+    query = select(Product)
     
     if available_only:
-        query = query.filter(Product.is_available == True)
+        query = query.where(Product.is_available == True)
     if category:
-        query = query.filter(Product.category.ilike(f"%{category}%"))
+        query = query.where(contains(Product.category, category))
     if min_price:
-        query = query.filter(Product.price_per_unit >= min_price)
+        query = query.where(Product.price_per_unit >= min_price)
     if max_price:
-        query = query.filter(Product.price_per_unit <= max_price)
+        query = query.where(Product.price_per_unit <= max_price)
+    
+    if q:
+        # Text search over name/category/description, most relevant first
+        # Ranked results are not keyset-paginated; only the top page is returned
+        result = await db.execute(search_products(query, q, dialect_name(db)).limit(limit))
+        return [product for product, _ in result.all()]
     
-    products = query.all()
+    result = await db.execute(keyset_page(query, Product, cursor, limit, dialect_name(db)))
+    products, next_cursor = split_page(result.scalars().all(), limit)
+    set_next_cursor(response, next_cursor)
     return products
 
+@router.get("/search", response_model=List[ProductSearchResponse])
+async def search_product_catalog(
+    q: str,
+    available_only: bool = True,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_async_db)
+):
+    query = select(Product)
+    if available_only:
+        query = query.where(Product.is_available == True)
+    
+    result = await db.execute(search_products(query, q, dialect_name(db)).limit(min(max(limit, 1), 100)))
+    
+    results = []
+    for product, relevance in result.all():
+        product.relevance = round(relevance or 0.0, 4)
+        results.append(product)
+    return results
+
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == product_id).first()
+async def get_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(Product).where(Product.id == product_id))
+    product = result.scalars().first()
     if not product:
         raise HTTPException(404, "Product not found")
     return product
 
+@router.patch("/bulk", response_model=List[ProductResponse])
+def bulk_update_products(
+    payload: ProductBulkUpdate,
+    background_tasks: BackgroundTasks,
+    current_supplier: Supplier = Depends(get_current_supplier),
+    db: Session = Depends(get_db)
+):
+    """Apply price, stock and other changes to many of your products at once"""
+    try:
+        products = update_products(db, current_supplier.id, payload)
+    except ProductUpdateError as e:
+        raise HTTPException(e.status_code, e.detail)
+    except Exception as e:
+        raise HTTPException(500, f"Failed to update products: {str(e)}")
+
+    background_tasks.add_task(
+        product_index.upsert_products,
+        [(product.id, product_index.product_text(product)) for product in products]
+    )
+    return products
+
 @router.patch("/{product_id}", response_model=ProductResponse)
 def update_product(
     product_id: int,
     payload: ProductUpdate,
+    background_tasks: BackgroundTasks,
     current_supplier: Supplier = Depends(get_current_supplier),
     db: Session = Depends(get_db)
 ):
@@ -76,8 +171,16 @@ def update_product(
     for key, value in payload.dict(exclude_unset=True).items():
         setattr(product, key, value)
     
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(409, "You already have a product with this name")
     db.refresh(product)
+    product_catalog.upsert_product(product)
+    background_tasks.add_task(
+        product_index.upsert_product, product.id, product_index.product_text(product)
+    )
     return product
 
 @router.post("/{product_id}/images")
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from ..schemas.user import SupplierCreate, SupplierUpdate, SupplierResponse
 from ..schemas.product import ProductResponse
 from ..models.user import Supplier
 from ..models.product import Product
-from ..config.database import get_db
+from ..models.order import Order
+from ..config.database import get_db, get_async_db
+from ..services.geo_index import supplier_geo_index
+from ..services.catalog import product_catalog
+from ..services.text_search import dialect_name
 from ..utils.auth_utils import get_current_user_firebase_uid, get_current_supplier
+from ..utils.pagination import keyset_page, page_size, set_next_cursor, split_page
 
 router = APIRouter()
 
@@ -30,6 +37,8 @@ def create_supplier(
         db.add(supplier)
         db.commit()
         db.refresh(supplier)
+        supplier_geo_index.upsert(supplier.id, supplier.latitude, supplier.longitude)
+        product_catalog.upsert_supplier(supplier)
         
         print(f"Supplier created successfully: {supplier.id}")
         return supplier
@@ -44,29 +53,47 @@ def get_supplier_profile(current: Supplier = Depends(get_current_supplier)):
     return current
 
 @router.patch("/me", response_model=SupplierResponse)
-def update_supplier_profile(
+async def update_supplier_profile(
     payload: SupplierUpdate,
     current: Supplier = Depends(get_current_supplier),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    # Same async session the dependency loaded `current` with
     for key, value in payload.dict(exclude_unset=True).items():
         setattr(current, key, value)
-    db.commit()
-    db.refresh(current)
+    await db.commit()
+    await db.refresh(current)
+    supplier_geo_index.upsert(current.id, current.latitude, current.longitude)
+    product_catalog.upsert_supplier(current)
     return current
 
 @router.get("/me/products", response_model=List[ProductResponse])
 def get_my_products(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     current: Supplier = Depends(get_current_supplier),
     db: Session = Depends(get_db)
 ):
-    products = db.query(Product).filter(Product.supplier_id == current.id).all()
+    limit = page_size(limit)
+    query = select(Product).where(Product.supplier_id == current.id)
+    rows = db.execute(keyset_page(query, Product, cursor, limit, dialect_name(db))).scalars().all()
+    products, next_cursor = split_page(rows, limit)
+    set_next_cursor(response, next_cursor)
     return products
 
 @router.get("/me/orders")
-def get_my_orders(
+async def get_my_orders(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     current: Supplier = Depends(get_current_supplier),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    orders = current.orders.all()
+    # Dynamic relationships cannot lazy-load on an async session
+    limit = page_size(limit)
+    query = select(Order).where(Order.supplier_id == current.id)
+    result = await db.execute(keyset_page(query, Order, cursor, limit, dialect_name(db)))
+    orders, next_cursor = split_page(result.scalars().all(), limit)
+    set_next_cursor(response, next_cursor)
     return orders
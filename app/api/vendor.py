@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from ..schemas.user import VendorCreate, VendorUpdate, VendorResponse
 from ..models.user import Vendor
-from ..config.database import get_db
+from ..config.database import get_db, get_async_db
 from ..utils.auth_utils import get_current_user_firebase_uid, get_current_vendor
 
 router = APIRouter()
@@ -50,13 +51,14 @@ def get_vendor_profile(current: Vendor = Depends(get_current_vendor)):
     return current
 
 @router.patch("/me", response_model=VendorResponse)
-def update_vendor_profile(
+async def update_vendor_profile(
     payload: VendorUpdate,
     current: Vendor = Depends(get_current_vendor),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    # Same async session the dependency loaded `current` with
     for key, value in payload.dict(exclude_unset=True).items():
         setattr(current, key, value)
-    db.commit()
-    db.refresh(current)
+    await db.commit()
+    await db.refresh(current)
     return current
@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timedelta
 import uuid
 from ..schemas.video_call import VideoCallCreate, VideoCallUpdate, VideoCallResponse
 from ..models.video_call import VideoCall
 from ..models.order import Order
 from ..models.user import Vendor, Supplier
-from ..config.database import get_db
+from ..config.database import get_db, get_async_db
+from ..services.text_search import dialect_name
 from ..utils.auth_utils import get_current_user_type
+from ..utils.pagination import keyset_page, page_size, set_next_cursor, split_page
 
 router = APIRouter()
 
@@ -66,40 +70,47 @@ def request_video_call(
         raise HTTPException(500, f"Failed to create video call: {str(e)}")
 
 @router.get("/", response_model=List[VideoCallResponse])
-def get_video_calls(
+async def get_video_calls(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     current_user = Depends(get_current_user_type),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     user = current_user["user"]
     user_type = current_user["type"]
     
-    query = db.query(VideoCall)
+    query = select(VideoCall)
     
     if user_type == "vendor":
-        query = query.filter(VideoCall.vendor_id == user.id)
+        query = query.where(VideoCall.vendor_id == user.id)
     elif user_type == "supplier":
-        query = query.filter(VideoCall.supplier_id == user.id)
+        query = query.where(VideoCall.supplier_id == user.id)
     
-    video_calls = query.order_by(VideoCall.created_at.desc()).all()
+    limit = page_size(limit)
+    result = await db.execute(keyset_page(query, VideoCall, cursor, limit, dialect_name(db)))
+    video_calls, next_cursor = split_page(result.scalars().all(), limit)
+    set_next_cursor(response, next_cursor)
     return video_calls
 
 @router.get("/{call_id}", response_model=VideoCallResponse)
-def get_video_call(
+async def get_video_call(
     call_id: int,
     current_user = Depends(get_current_user_type),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     user = current_user["user"]
     user_type = current_user["type"]
     
-    query = db.query(VideoCall).filter(VideoCall.id == call_id)
+    query = select(VideoCall).where(VideoCall.id == call_id)
     
     if user_type == "vendor":
-        query = query.filter(VideoCall.vendor_id == user.id)
+        query = query.where(VideoCall.vendor_id == user.id)
     elif user_type == "supplier":
-        query = query.filter(VideoCall.supplier_id == user.id)
+        query = query.where(VideoCall.supplier_id == user.id)
     
-    video_call = query.first()
+    result = await db.execute(query)
+    video_call = result.scalars().first()
     if not video_call:
         raise HTTPException(404, "Video call not found")
     
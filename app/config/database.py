@@ -1,8 +1,11 @@
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .settings import settings
+from ..utils.text_utils import register_sqlite_text_functions
 
 # Create SQLAlchemy engine
 engine = create_engine(
@@ -11,9 +14,40 @@ engine = create_engine(
     pool_recycle=300
 )
 
+# SQLite has no pg_trgm; register Python equivalents used by product search
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _register_text_functions(dbapi_connection, connection_record):
+        register_sqlite_text_functions(dbapi_connection)
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+def async_database_url(url: str) -> str:
+    """The same database with its asyncio driver (asyncpg for Postgres, aiosqlite for SQLite)"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+# Async engine for routes that should not hold a threadpool thread while waiting on the database
+async_engine = create_async_engine(
+    settings.async_database_url or async_database_url(settings.database_url),
+    pool_pre_ping=True,
+    pool_recycle=300
+)
+
+if async_engine.dialect.name == "sqlite":
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _register_async_text_functions(dbapi_connection, connection_record):
+        register_sqlite_text_functions(dbapi_connection)
+
+# Objects stay readable after commit; lazy loads are not possible on async sessions
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Create Base class
 Base = declarative_base()
 
@@ -24,3 +58,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Async dependency to get DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,36 @@
+
+from typing import List, Tuple
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+# create_all only creates missing tables, so columns added to a model after
+# its table exists are added here: (table, column, column DDL)
+COLUMN_MIGRATIONS: List[Tuple[str, str, str]] = [
+    ("chat_messages", "generation_mode", "VARCHAR(20)"),
+    ("chat_messages", "reply_to_id", "INTEGER REFERENCES chat_messages (id)"),
+    ("chat_sessions", "summary", "TEXT"),
+    ("chat_sessions", "summarized_until_id", "INTEGER"),
+]
+
+# Indexes on migrated columns: (index name, table, column list)
+INDEX_MIGRATIONS: List[Tuple[str, str, str]] = [
+    ("ix_chat_messages_reply_to_id", "chat_messages", "reply_to_id"),
+]
+
+def apply_migrations(engine: Engine):
+    """Add missing columns and indexes to existing tables; safe to run on every start"""
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    # Postgres skips columns another worker added meanwhile; SQLite has no IF NOT EXISTS here
+    if_not_exists = "IF NOT EXISTS " if engine.dialect.name == "postgresql" else ""
+    with engine.begin() as conn:
+        for table, column, ddl in COLUMN_MIGRATIONS:
+            if table not in tables:
+                continue
+            if column in {existing["name"] for existing in inspector.get_columns(table)}:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {if_not_exists}{column} {ddl}"))
+            print(f"Added column {table}.{column}")
+        for name, table, columns in INDEX_MIGRATIONS:
+            if table in tables:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
@@ -1,16 +1,66 @@
 
 import os
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     database_url: str
+    async_database_url: Optional[str] = None  # Defaults to database_url with asyncpg/aiosqlite
     google_api_key: str
     firebase_credentials_path: str
     redis_url: str
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    geo_index_cell_size_deg: float = 0.1
+    geo_index_refresh_seconds: int = 300
+    catalog_snapshot_enabled: bool = True
+    catalog_refresh_seconds: int = 300
+    embedding_model: str = "models/text-embedding-004"
+    index_dir: str = "data/indexes"
+    kb_wait_seconds: float = 2.0
+    kb_retry_seconds: float = 60.0  # Back-off before rebuilding after a failed build
+    kb_source_paths: List[str] = []  # Files or directories of .txt, .md and .jsonl documents
+    kb_index_type: str = "flat"  # flat, ivf or hnsw
+    kb_embed_batch_size: int = 64
+    kb_ivf_nlist: int = 256
+    kb_ivf_nprobe: int = 8
+    kb_hnsw_m: int = 32
+    kb_hnsw_ef_search: int = 64
+    kb_retrieval_mode: str = "hybrid"  # hybrid or vector
+    kb_retrieval_candidates: int = 20
+    kb_rrf_k: int = 60
+    embedding_cache_path: str = "data/embedding_cache.sqlite3"
+    embedding_cache_max_entries: int = 100000
+    embedding_cache_memory_entries: int = 2048
+    llm_backend: str = "gemini"  # gemini or local
+    llm_model: str = "gemini-2.0-flash"
+    llm_max_concurrency: int = 32
+    llm_timeout_seconds: float = 20.0
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_reset_seconds: float = 30.0
+    local_llm_latency_ms: int = 0
+    celery_broker_url: Optional[str] = None  # Defaults to redis_url
+    celery_result_backend: Optional[str] = None  # Defaults to redis_url
+    celery_task_always_eager: bool = False
+    chat_job_result_expires_seconds: int = 3600
+    chat_generation_mode: str = "two_pass"  # two_pass or single_pass
+    template_responses_enabled: bool = True
+    chat_memory_turns: int = 6  # Recent messages kept verbatim = 2 * turns
+    chat_summary_max_chars: int = 1500
+    extraction_confidence_threshold: float = 0.8
+    extraction_cache_backend: str = "memory"  # memory, redis or none
+    extraction_cache_ttl_seconds: int = 86400
+    extraction_cache_max_entries: int = 10000
+    semantic_product_search_enabled: bool = True
+    product_search_k: int = 50
+    product_search_min_score: float = 0.6
+    product_index_refresh_seconds: int = 300  # Resync with products written by other processes
+    product_index_save_seconds: float = 30.0  # Batches index writes after product changes
+    product_import_batch_size: int = 500
+    product_import_max_errors: int = 1000  # Failed rows listed in an import report; the rest are only counted
+    page_size_default: int = 50
+    page_size_max: int = 200  # Cap on the limit of cursor-paginated list endpoints
     
     class Config:
         env_file = ".env"
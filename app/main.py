@@ -4,12 +4,18 @@ from fastapi.middleware.cors import CORSMiddleware
 # Import all models to ensure they're registered with SQLAlchemy
 from .models import user, product, order, video_call, chat
 from .config.database import engine, Base
+from .config.migrations import apply_migrations
+from .services.embedding_cache import get_embeddings
+from .services.extraction_cache import extraction_cache
+from .services.llm_provider import llm_provider
+from .services.product_index import product_index
 from .api import auth, vendor, supplier, products, chat as chat_api, video_call as video_call_api, orders
 
 # Create all tables in the correct order
 try:
     print("Creating all database tables...")
     Base.metadata.create_all(bind=engine)
+    apply_migrations(engine)
     print("Database tables created successfully")
 except Exception as e:
     print(f"Database creation error: {e}")
@@ -39,6 +45,10 @@ app.include_router(orders.router, prefix="/orders", tags=["orders"])
 app.include_router(chat_api.router, prefix="/chat", tags=["chat"])
 app.include_router(video_call_api.router, prefix="/video-calls", tags=["video-calls"])
 
+@app.on_event("shutdown")
+def flush_indexes():
+    product_index.flush()
+
 @app.get("/")
 async def root():
     return {"message": "VendorGPT API is running!", "version": "1.0.0"}
@@ -51,6 +61,17 @@ async def health_check():
         "database_connected": True
     }
 
+@app.get("/debug/caches")
+async def cache_stats():
+    return {
+        "embeddings": get_embeddings().stats(),
+        "extraction": extraction_cache.stats() if extraction_cache else None
+    }
+
+@app.get("/debug/llm")
+async def llm_stats():
+    return llm_provider.stats()
+
 # Debug route to show all registered routes
 @app.get("/debug/routes")
 async def debug_routes():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..config.database import Base
@@ -12,6 +12,8 @@ class ChatSession(Base):
     status = Column(String, default="active")  # active, closed
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     closed_at = Column(DateTime)
+    summary = Column(Text)  # Rolling summary of messages up to summarized_until_id
+    summarized_until_id = Column(Integer)  # Last ChatMessage id folded into summary
     
     # Relationships
     vendor = relationship("Vendor")
@@ -19,6 +21,10 @@ class ChatSession(Base):
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Keyset pagination of a session's history, see utils/pagination.py
+        Index("ix_chat_messages_session_created_at_id", "session_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("chat_sessions.id"), nullable=False)
@@ -26,6 +32,8 @@ class ChatMessage(Base):
     message_content = Column(Text, nullable=False)
     extracted_requirements = Column(Text)  # JSON string of extracted requirements
     suggested_products = Column(Text)  # JSON string of product suggestions
+    generation_mode = Column(String(20))  # two_pass, single_pass, template; bot messages only
+    reply_to_id = Column(Integer, ForeignKey("chat_messages.id"), index=True)  # User message a bot message answers
     is_processed = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
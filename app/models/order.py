@@ -1,17 +1,22 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..config.database import Base
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Keyset pagination of each side's order list, see utils/pagination.py
+        Index("ix_orders_vendor_created_at_id", "vendor_id", "created_at", "id"),
+        Index("ix_orders_supplier_created_at_id", "supplier_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     vendor_id = Column(Integer, ForeignKey("vendors.id"), nullable=False)
     supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
-    quantity = Column(Float, nullable=False)
-    unit_price = Column(Float, nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)  # Cart orders: first item, placeholder; order_items are authoritative
+    quantity = Column(Float, nullable=False)  # Cart orders: placeholder, summed units across order_items
+    unit_price = Column(Float, nullable=False)  # Cart orders: placeholder, total_amount / quantity
     total_amount = Column(Float, nullable=False)
     status = Column(String, default="pending")  # pending, confirmed, preparing, delivered, cancelled
     requirements = Column(Text)  # Original vendor requirements
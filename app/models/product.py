@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, DDL, Index, UniqueConstraint, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..config.database import Base
@@ -26,6 +26,39 @@ class Product(Base):
     orders = relationship("Order", back_populates="product", lazy="dynamic")
     product_images = relationship("ProductImage", back_populates="product", lazy="dynamic")
 
+    __table_args__ = (
+        # Bulk imports upsert on (supplier_id, name), see services/product_import.py
+        UniqueConstraint("supplier_id", "name", name="uq_products_supplier_name"),
+        # Keyset pagination on (created_at, id), see utils/pagination.py
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_supplier_created_at_id", "supplier_id", "created_at", "id"),
+    )
+
+# Text search indexes (Postgres only). Trigram GIN indexes serve the
+# leading-wildcard ILIKE and `%` similarity filters; the tsvector expression
+# must stay identical to text_search.search_document(). SQLite gets Python
+# similarity functions instead, see config/database.py.
+event.listen(
+    Product.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+for _column in ("name", "category", "description"):
+    event.listen(
+        Product.__table__, "after_create",
+        DDL(
+            f"CREATE INDEX IF NOT EXISTS ix_products_{_column}_trgm "
+            f"ON products USING gin ({_column} gin_trgm_ops)"
+        ).execute_if(dialect="postgresql")
+    )
+event.listen(
+    Product.__table__, "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_products_search_tsv ON products USING gin "
+        "(to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(category, '') "
+        "|| ' ' || coalesce(description, '')))"
+    ).execute_if(dialect="postgresql")
+)
+
 class ProductImage(Base):
     __tablename__ = "product_images"
     
@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..config.database import Base
 
 class VideoCall(Base):
     __tablename__ = "video_calls"
+    __table_args__ = (
+        # Keyset pagination of each side's call list, see utils/pagination.py
+        Index("ix_video_calls_vendor_created_at_id", "vendor_id", "created_at", "id"),
+        Index("ix_video_calls_supplier_created_at_id", "supplier_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
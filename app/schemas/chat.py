@@ -37,6 +37,21 @@ class ChatResponse(BaseModel):
     products: List[Dict[str, Any]] = []
     requires_clarification: bool = False
     extracted_requirements: Optional[Dict[str, Any]] = None
+    generation_mode: Optional[str] = None
+
+class ConversationTurn(BaseModel):
+    role: str  # user, bot
+    content: str
+
+class ConversationHistory(BaseModel):
+    summary: Optional[str] = None  # Rolling summary of turns older than `turns`
+    turns: List[ConversationTurn] = []
+
+class ChatJobResponse(BaseModel):
+    message_id: int
+    status: str  # queued, pending, processing, completed, failed
+    result: Optional[ChatResponse] = None
+    detail: Optional[str] = None
 
 class ChatMessageResponse(BaseModel):
     id: int
@@ -44,6 +59,8 @@ class ChatMessageResponse(BaseModel):
     message_content: str
     extracted_requirements: Optional[str]
     suggested_products: Optional[str]
+    generation_mode: Optional[str] = None
+    reply_to_id: Optional[int] = None
     created_at: datetime
     is_processed: bool
 
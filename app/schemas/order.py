@@ -49,3 +49,13 @@ class OrderResponse(OrderBase):
 class OrderItemCreate(BaseModel):
     product_id: int
     quantity: float = Field(..., gt=0)
+
+class CartCheckout(BaseModel):
+    items: List[OrderItemCreate] = Field(..., min_length=1, max_length=100)
+    requirements: Optional[str] = None
+    delivery_address: Optional[str] = None
+    delivery_date: Optional[datetime] = None
+
+class CartOrderResponse(OrderResponse):
+    """One supplier's share of a cart; product_id, quantity and unit_price are placeholders, items are authoritative"""
+    items: List[OrderItemResponse] = []
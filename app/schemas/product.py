@@ -25,6 +25,12 @@ class ProductUpdate(BaseModel):
     description: Optional[str] = None
     is_available: Optional[bool] = None
 
+class ProductBulkUpdateItem(ProductUpdate):
+    id: int
+
+class ProductBulkUpdate(BaseModel):
+    items: List[ProductBulkUpdateItem] = Field(..., min_length=1, max_length=500)
+
 class ProductResponse(ProductBase):
     id: int
     supplier_id: int
@@ -36,6 +42,9 @@ class ProductResponse(ProductBase):
     class Config:
         from_attributes = True
 
+class ProductSearchResponse(ProductResponse):
+    relevance: float
+
 class ProductImageResponse(BaseModel):
     id: int
     product_id: int
@@ -46,3 +55,13 @@ class ProductImageResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class ProductImportRowError(BaseModel):
+    line: int
+    errors: List[str]
+
+class ProductImportReport(BaseModel):
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[ProductImportRowError] = []
@@ -2,75 +2,34 @@
 import os
 import json
 import math
-from typing import List, Dict, Any, Optional
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain.schema import HumanMessage, SystemMessage
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
+import asyncio
+import threading
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
 # from langchain_community.embeddings import HuggingFaceEmbeddings
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
 from ..models.product import Product
 from ..models.user import Supplier, Vendor
-from ..schemas.chat import ChatResponse, RequirementExtraction, ProductMatch
+from ..schemas.chat import ChatResponse, ConversationHistory, RequirementExtraction, ProductMatch
 from ..config.settings import settings
+from .geo_index import apply_proximity_filter
+from .catalog import product_catalog
+from .text_search import contains
+from .product_index import product_index
+from .knowledge_base import KnowledgeBase
+from .kb_ingest import configured_sources, knowledge_ingestor
+from .embedding_cache import get_embeddings
+from .extraction_cache import extraction_cache
+from .requirement_parser import requirement_parser
+from .response_templates import response_templates, TemplateValues
+from .llm_provider import llm_provider
 # from dotenv import load_dotenv
 # load_dotenv()
 
-class VendorGPTAgent:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            google_api_key=settings.google_api_key,
-            temperature=0.3
-        )
-        
-        
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/text-embedding-004",
-            google_api_key=settings.google_api_key
-        )
-        
-        self.vector_store = None
-        self._setup_knowledge_base()
-    
-    def _setup_knowledge_base(self):
-        """Setup RAG system with product and market knowledge"""
-        knowledge_texts = [
-            "Fresh vegetables like onions, tomatoes, potatoes are essential for street food vendors",
-            "Quality indicators: Fresh vegetables should be firm, no dark spots, good color",
-            "Pricing factors: Season, quality, quantity, location affect vegetable prices",
-            "Storage tips: Keep vegetables in cool, dry place to maintain freshness",
-            "Bulk buying advantages: Better prices for larger quantities, reduced frequent trips",
-            "Local suppliers often provide fresher products and better prices",
-            "Video verification helps ensure product quality before purchase",
-            "Trust scores help vendors choose reliable suppliers",
-            "Minimum order quantities vary by supplier and product type",
-            "Delivery options depend on distance and order value",
-            "Seasonal variations affect prices - onions cheaper in winter, tomatoes in summer",
-            "Quality grades: Premium (A), Good (B), Basic (C) with different pricing",
-            "Payment terms: Cash on delivery, advance payment for bulk orders",
-            "Fresh produce should be consumed within 2-3 days for best quality",
-            "Wholesale markets offer better prices but require larger quantities",
-        ]
-        
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=200,
-            chunk_overlap=20
-        )
-        
-        documents = text_splitter.create_documents(knowledge_texts)
-        self.vector_store = FAISS.from_documents(documents, self.embeddings)
-    
-    def extract_requirements(self, message: str, language: str = "hindi") -> RequirementExtraction:
-        """Extract structured requirements from vendor message"""
-        system_prompt = f"""
-        You are an AI assistant for street food vendors in India. Extract requirements from the vendor's message.
-        The message might be in {language} or English.
-        
-        Extract the following information and return ONLY a JSON object:
-        {{
+# Shared by the extraction and single-pass prompts
+REQUIREMENT_FIELDS = """        {
             "product_name": "name of the vegetable/ingredient needed",
             "quantity": number (convert text to number),
             "unit": "kg, pieces, liter, etc.",
@@ -79,9 +38,9 @@ class VendorGPTAgent:
             "quality_preference": "premium, good, or basic",
             "location_preference": "string or null",
             "confidence_score": number between 0-1
-        }}
-        
-        Common Hindi terms mapping:
+        }"""
+
+HINDI_TERMS = """        Common Hindi terms mapping:
         - प्याज/pyaz = onions
         - टमाटर/tamatar = tomatoes  
         - आलू/aloo = potatoes
@@ -94,7 +53,141 @@ class VendorGPTAgent:
         - रुपये/rupees = budget amount
         - चाहिए/chahiye = need
         - जल्दी = urgent
-        - अच्छी गुणवत्ता = good quality
+        - अच्छी गुणवत्ता = good quality"""
+
+class VendorGPTAgent:
+    def __init__(self):
+        # Backend, concurrency limit, timeouts and circuit breaker come from settings
+        self.llm = llm_provider
+        
+        
+        # Cached so repeated documents and queries never hit the network twice
+        self.embeddings = get_embeddings()
+        
+        self.max_distance_km = 25
+        self.knowledge_base = None
+        self._setup_knowledge_base()
+    
+    @property
+    def vector_store(self):
+        """Knowledge base vector store, or None while it is still loading"""
+        return self.knowledge_base.get_vector_store(timeout=settings.kb_wait_seconds)
+    
+    def _setup_knowledge_base(self):
+        """Setup RAG system with product and market knowledge"""
+        # Syncs the persisted index with the knowledge sources in the background
+        self.knowledge_base = KnowledgeBase(
+            sources=configured_sources,
+            ingestor=knowledge_ingestor(self.embeddings),
+            hybrid=settings.kb_retrieval_mode == "hybrid",
+            candidates=settings.kb_retrieval_candidates,
+            rrf_k=settings.kb_rrf_k,
+            retry_seconds=settings.kb_retry_seconds
+        )
+        self.knowledge_base.start()
+    
+    def _retrieve_context(self, query: str, k: int = 3) -> str:
+        """Relevant knowledge base text for a query; empty while the index is loading"""
+        vector_store = self.vector_store
+        if vector_store is None or not query:
+            return ""
+        retriever = self.knowledge_base.get_retriever(timeout=0)
+        if retriever is not None:
+            context_docs = retriever.search(query, k=k)
+        else:
+            context_docs = vector_store.similarity_search(query, k=k)
+        return "\n".join([doc.page_content for doc in context_docs])
+    
+    async def _aretrieve_context(self, query: str, k: int = 3) -> str:
+        """Async _retrieve_context; embeds the query without blocking the event loop"""
+        vector_store = self.knowledge_base.get_vector_store(timeout=0)
+        if vector_store is None:
+            vector_store = await asyncio.to_thread(
+                self.knowledge_base.get_vector_store, settings.kb_wait_seconds
+            )
+        if vector_store is None or not query:
+            return ""
+        retriever = self.knowledge_base.get_retriever(timeout=0)
+        if retriever is not None:
+            context_docs = await retriever.asearch(query, k=k)
+        else:
+            context_docs = await vector_store.asimilarity_search(query, k=k)
+        return "\n".join([doc.page_content for doc in context_docs])
+    
+    def extract_requirements(self, message: str, language: str = "hindi") -> RequirementExtraction:
+        """Extract structured requirements from vendor message"""
+        requirements = self._local_requirements(message, language)
+        if requirements is not None:
+            return requirements
+        
+        try:
+            response = self.llm.invoke(self._extraction_messages(message, language))
+            requirements = self._parse_extraction(response.content)
+        except Exception as e:
+            # Fallback extraction, not cached so the next attempt retries the LLM
+            return self._fallback_extraction(message)
+        
+        self._cache_requirements(message, language, requirements)
+        return requirements
+    
+    async def aextract_requirements(self, message: str, language: str = "hindi") -> RequirementExtraction:
+        """Async extract_requirements"""
+        requirements = await self._alocal_requirements(message, language)
+        if requirements is not None:
+            return requirements
+        
+        try:
+            response = await self.llm.ainvoke(self._extraction_messages(message, language))
+            requirements = self._parse_extraction(response.content)
+        except Exception:
+            return self._fallback_extraction(message)
+        
+        await self._acache_requirements(message, language, requirements)
+        return requirements
+    
+    def _local_requirements(self, message: str, language: str) -> Optional[RequirementExtraction]:
+        """Requirements available without an LLM call: a confident parse or a cached extraction"""
+        # Common orders are parsed locally; only ambiguous messages go to the LLM
+        parsed = requirement_parser.parse(message)
+        if parsed.confidence_score >= settings.extraction_confidence_threshold:
+            return parsed
+        
+        if extraction_cache is not None:
+            return extraction_cache.get(message, language)
+        return None
+    
+    async def _alocal_requirements(self, message: str, language: str) -> Optional[RequirementExtraction]:
+        """Async _local_requirements; the cache lookup runs off the event loop"""
+        parsed = requirement_parser.parse(message)
+        if parsed.confidence_score >= settings.extraction_confidence_threshold:
+            return parsed
+        
+        if extraction_cache is not None:
+            return await extraction_cache.aget(message, language)
+        return None
+    
+    def _cache_requirements(self, message: str, language: str, requirements: RequirementExtraction):
+        if extraction_cache is not None:
+            extraction_cache.set(message, language, requirements)
+    
+    async def _acache_requirements(self, message: str, language: str, requirements: RequirementExtraction):
+        if extraction_cache is not None:
+            await extraction_cache.aset(message, language, requirements)
+    
+    def _parse_extraction(self, content: str) -> RequirementExtraction:
+        extracted_data = json.loads(content)
+        return RequirementExtraction(**extracted_data)
+    
+    def _extraction_messages(self, message: str, language: str) -> List[Any]:
+        """Prompt for LLM requirement extraction"""
+        system_prompt = f"""
+        You are an AI assistant for street food vendors in India. Extract requirements from the vendor's message.
+        The message might be in {language} or English.
+        
+        Extract the following information and return ONLY a JSON object:
+{REQUIREMENT_FIELDS}
+        
+{HINDI_TERMS}
         
         Examples:
         "10 किलो प्याज चाहिए बजट 300" → {{"product_name": "onions", "quantity": 10, "unit": "kg", "budget": 300, "urgency": "normal", "quality_preference": "good", "confidence_score": 0.9}}
@@ -103,81 +196,347 @@ class VendorGPTAgent:
         Return ONLY the JSON object, no other text.
         """
         
-        messages = [
+        return [
             SystemMessage(content=system_prompt),
             HumanMessage(content=f"Extract requirements from: {message}")
         ]
-        
-        try:
-            response = self.llm(messages)
-            extracted_data = json.loads(response.content)
-            return RequirementExtraction(**extracted_data)
-        except Exception as e:
-            # Fallback extraction
-            return self._fallback_extraction(message)
     
     def _fallback_extraction(self, message: str) -> RequirementExtraction:
         """Fallback extraction if JSON parsing fails"""
-        message_lower = message.lower()
-        
-        # Product mapping
-        product_map = {
-            'onion': 'onions', 'प्याज': 'onions', 'pyaz': 'onions',
-            'tomato': 'tomatoes', 'टमाटर': 'tomatoes', 'tamatar': 'tomatoes',
-            'potato': 'potatoes', 'आलू': 'potatoes', 'aloo': 'potatoes',
-            'chili': 'green chilies', 'मिर्च': 'green chilies', 'mirch': 'green chilies',
-            'ginger': 'ginger', 'अदरक': 'ginger', 'adrak': 'ginger',
-            'garlic': 'garlic', 'लहसुन': 'garlic', 'lahsun': 'garlic',
-        }
-        
-        product_name = "vegetables"
-        for key, value in product_map.items():
-            if key in message_lower:
-                product_name = value
-                break
-        
-        # Extract quantity using regex
-        import re
-        quantity_match = re.search(r'(\d+(?:\.\d+)?)', message)
-        quantity = float(quantity_match.group(1)) if quantity_match else 1.0
-        
-        # Extract budget
-        budget_match = re.search(r'(?:budget|बजट|rupees|रुपये).{0,10}(\d+)', message_lower)
-        budget = float(budget_match.group(1)) if budget_match else None
-        
-        # Extract urgency
-        urgency = "urgent" if any(word in message_lower for word in ['urgent', 'जल्दी', 'jaldi']) else "normal"
-        
-        return RequirementExtraction(
-            product_name=product_name,
-            quantity=quantity,
-            unit="kg",
-            budget=budget,
-            urgency=urgency,
-            quality_preference="good",
-            confidence_score=0.6
-        )
+        return requirement_parser.parse(message)
     
     def generate_response(self, 
                          message: str, 
                          vendor_id: int, 
                          language: str,
-                         db: Session) -> ChatResponse:
+                         db: Session,
+                         history: Optional[ConversationHistory] = None) -> ChatResponse:
         """Generate conversational response with product suggestions"""
+        if settings.chat_generation_mode == "single_pass" and not self._use_templates(message):
+            requirements, templates = self._single_pass(message, language, history)
+            matching_products = self._find_matching_products(requirements, vendor_id, db)
+            return self._build_chat_response(
+                self._single_pass_reply(templates, requirements, matching_products, language),
+                requirements, matching_products, language, generation_mode="single_pass"
+            )
         
         # Extract requirements
         requirements = self.extract_requirements(message, language)
         
+        if self._use_templates(message):
+            matching_products = self._find_matching_products(requirements, vendor_id, db)
+            return self._build_chat_response(
+                self._template_reply(message, requirements, matching_products, language, vendor_id, db),
+                requirements, matching_products, language, generation_mode="template"
+            )
+        
         # Get relevant context from vector store
-        context_docs = self.vector_store.similarity_search(
-            f"{requirements.product_name} {requirements.quantity} {language}",
-            k=3
-        )
-        context = "\n".join([doc.page_content for doc in context_docs])
+        context = self._retrieve_context(self._context_query(requirements, message), k=3)
         
         # Find matching products
         matching_products = self._find_matching_products(requirements, vendor_id, db)
         
+        current_lang = self._language_prompts(requirements, context, matching_products, language)
+        
+        if matching_products:
+            try:
+                response = self.llm.invoke(self._reply_messages(current_lang, message, history))
+                bot_response = response.content
+            except Exception as e:
+                print(f"LLM reply failed, using template: {e}")
+                bot_response = self._template_reply(message, requirements, matching_products, language, vendor_id, db)
+        else:
+            bot_response = current_lang["no_results"]
+        
+        return self._build_chat_response(bot_response, requirements, matching_products, language)
+    
+    async def agenerate_response(self, 
+                                 message: str, 
+                                 vendor_id: int, 
+                                 language: str,
+                                 db: Session,
+                                 history: Optional[ConversationHistory] = None) -> ChatResponse:
+        """Async generate_response; retrieval and product matching run concurrently"""
+        if settings.chat_generation_mode == "single_pass" and not self._use_templates(message):
+            requirements, templates = await self._asingle_pass(message, language, history)
+            matching_products = await asyncio.to_thread(
+                self._find_matching_products, requirements, vendor_id, db
+            )
+            return self._build_chat_response(
+                self._single_pass_reply(templates, requirements, matching_products, language),
+                requirements, matching_products, language, generation_mode="single_pass"
+            )
+        
+        requirements = await self.aextract_requirements(message, language)
+        
+        if self._use_templates(message):
+            matching_products = await asyncio.to_thread(
+                self._find_matching_products, requirements, vendor_id, db
+            )
+            bot_response = await asyncio.to_thread(
+                self._template_reply, message, requirements, matching_products, language, vendor_id, db
+            )
+            return self._build_chat_response(
+                bot_response, requirements, matching_products, language, generation_mode="template"
+            )
+        
+        # Both only depend on the requirements. Matching uses the sync session,
+        # which is not touched by anything else while the thread runs
+        context, matching_products = await asyncio.gather(
+            self._aretrieve_context(self._context_query(requirements, message), k=3),
+            asyncio.to_thread(self._find_matching_products, requirements, vendor_id, db)
+        )
+        
+        current_lang = self._language_prompts(requirements, context, matching_products, language)
+        
+        if matching_products:
+            try:
+                response = await self.llm.ainvoke(self._reply_messages(current_lang, message, history))
+                bot_response = response.content
+            except Exception as e:
+                print(f"LLM reply failed, using template: {e}")
+                bot_response = await asyncio.to_thread(
+                    self._template_reply, message, requirements, matching_products, language, vendor_id, db
+                )
+        else:
+            bot_response = current_lang["no_results"]
+        
+        return self._build_chat_response(bot_response, requirements, matching_products, language)
+    
+    async def astream_response(self, 
+                               message: str, 
+                               vendor_id: int, 
+                               language: str,
+                               db: Session,
+                               history: Optional[ConversationHistory] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream a reply as (event, data) pairs.
+        
+        Yields "requirements" and "products" as soon as they are known, the
+        reply as "token" chunks, then "done" with the complete ChatResponse.
+        """
+        if settings.chat_generation_mode == "single_pass" and not self._use_templates(message):
+            requirements, templates = await self._asingle_pass(message, language, history)
+            yield "requirements", requirements.dict()
+            matching_products = await asyncio.to_thread(
+                self._find_matching_products, requirements, vendor_id, db
+            )
+            yield "products", {
+                "products": [self._format_product_for_response(p) for p in matching_products],
+                "suggestions": self._generate_suggestions(requirements, matching_products, language)
+            }
+            bot_response = self._single_pass_reply(templates, requirements, matching_products, language)
+            yield "token", {"text": bot_response}
+            yield "done", self._build_chat_response(
+                bot_response, requirements, matching_products, language, generation_mode="single_pass"
+            )
+            return
+        
+        requirements = await self.aextract_requirements(message, language)
+        yield "requirements", requirements.dict()
+        
+        if self._use_templates(message):
+            matching_products = await asyncio.to_thread(
+                self._find_matching_products, requirements, vendor_id, db
+            )
+            yield "products", {
+                "products": [self._format_product_for_response(p) for p in matching_products],
+                "suggestions": self._generate_suggestions(requirements, matching_products, language)
+            }
+            bot_response = await asyncio.to_thread(
+                self._template_reply, message, requirements, matching_products, language, vendor_id, db
+            )
+            yield "token", {"text": bot_response}
+            yield "done", self._build_chat_response(
+                bot_response, requirements, matching_products, language, generation_mode="template"
+            )
+            return
+        
+        context, matching_products = await asyncio.gather(
+            self._aretrieve_context(self._context_query(requirements, message), k=3),
+            asyncio.to_thread(self._find_matching_products, requirements, vendor_id, db)
+        )
+        yield "products", {
+            "products": [self._format_product_for_response(p) for p in matching_products],
+            "suggestions": self._generate_suggestions(requirements, matching_products, language)
+        }
+        
+        current_lang = self._language_prompts(requirements, context, matching_products, language)
+        
+        if matching_products:
+            chunks = []
+            try:
+                async for chunk in self.llm.astream(self._reply_messages(current_lang, message, history)):
+                    if chunk.content:
+                        chunks.append(chunk.content)
+                        yield "token", {"text": chunk.content}
+            except Exception as e:
+                if chunks:
+                    raise
+                # Nothing sent yet, so the template reply can stand in
+                print(f"LLM reply failed, using template: {e}")
+                chunks.append(await asyncio.to_thread(
+                    self._template_reply, message, requirements, matching_products, language, vendor_id, db
+                ))
+                yield "token", {"text": chunks[0]}
+            bot_response = "".join(chunks)
+        else:
+            bot_response = current_lang["no_results"]
+            yield "token", {"text": bot_response}
+        
+        yield "done", self._build_chat_response(bot_response, requirements, matching_products, language)
+    
+    def _use_templates(self, message: str) -> bool:
+        """Orders get a templated reply; free-form questions still go to the LLM"""
+        return settings.template_responses_enabled and not requirement_parser.is_question(message)
+    
+    def _template_intent(self, 
+                         requirements: RequirementExtraction,
+                         matching_products: List[ProductMatch]) -> str:
+        if not requirements.product_name or requirements.product_name == "vegetables":
+            return "clarification_needed"
+        if matching_products:
+            return "cheapest_option" if requirements.quality_preference == "basic" else "found_suppliers"
+        if requirements.budget:
+            return "out_of_budget"
+        return "no_results"
+    
+    def _template_reply(self, 
+                        message: str,
+                        requirements: RequirementExtraction,
+                        matching_products: List[ProductMatch],
+                        language: str,
+                        vendor_id: int,
+                        db: Session) -> str:
+        """Reply rendered from the template registry for the message's intent"""
+        intent = self._template_intent(requirements, matching_products)
+        products = matching_products
+        if intent == "out_of_budget":
+            # Only worth mentioning the budget if something matches without it
+            products = self._find_matching_products(requirements.copy(update={"budget": None}), vendor_id, db)
+            if not products:
+                intent = "no_results"
+        
+        best = products[0] if products else None
+        return response_templates.render(
+            intent,
+            language,
+            count=len(products),
+            product_name=requirements.product_name,
+            quantity=f"{requirements.quantity:g}",
+            unit=requirements.unit,
+            budget=f"{requirements.budget:g}" if requirements.budget else "",
+            best_supplier=best.supplier_name if best else "",
+            best_price=best.price_per_unit if best else "",
+            best_total=best.total_cost if best else "",
+            best_distance=best.distance_km if best else "",
+            unit_type=best.unit_type if best else requirements.unit
+        )
+    
+    def _single_pass(self,
+                     message: str,
+                     language: str,
+                     history: Optional[ConversationHistory] = None) -> Tuple[RequirementExtraction, Optional[Dict[str, str]]]:
+        """Requirements and reply templates from one LLM call"""
+        try:
+            response = self.llm.invoke(self._single_pass_messages(message, language, history))
+            return self._parse_single_pass(response.content)
+        except Exception as e:
+            print(f"Single-pass generation failed: {e}")
+            return self._fallback_extraction(message), None
+    
+    async def _asingle_pass(self,
+                            message: str,
+                            language: str,
+                            history: Optional[ConversationHistory] = None) -> Tuple[RequirementExtraction, Optional[Dict[str, str]]]:
+        """Async _single_pass"""
+        try:
+            response = await self.llm.ainvoke(self._single_pass_messages(message, language, history))
+            return self._parse_single_pass(response.content)
+        except Exception as e:
+            print(f"Single-pass generation failed: {e}")
+            return self._fallback_extraction(message), None
+    
+    def _single_pass_messages(self,
+                              message: str,
+                              language: str,
+                              history: Optional[ConversationHistory] = None) -> List[Any]:
+        """Prompt returning requirements plus reply templates in one JSON object"""
+        reply_language = "Hindi" if language == "hindi" else "English"
+        system_prompt = f"""
+        You are VendorBot, a helpful AI assistant for street food vendors in India.
+        The vendor's message might be in {language} or English. Extract their requirement and
+        write two short, friendly reply templates in {reply_language}.
+        
+        Return ONLY a JSON object:
+        {{
+            "requirements": {{...requirement fields...}},
+            "reply_found": "reply for when suppliers are found",
+            "reply_none": "reply for when no supplier matches"
+        }}
+        
+        Requirement fields:
+{REQUIREMENT_FIELDS}
+        
+{HINDI_TERMS}
+        
+        Suppliers are searched after you answer, so never invent supplier names or prices.
+        Use these placeholders where such details belong; they are filled in afterwards:
+        {{count}} suppliers found, {{best_supplier}} cheapest supplier, {{best_price}} its price per unit,
+        {{best_total}} its total cost, {{best_distance}} its distance in km,
+        {{product_name}}, {{quantity}}, {{unit}}, {{budget}}.
+        
+        Return ONLY the JSON object, no other text.
+        """
+        
+        return self._with_history(system_prompt, message, history)
+    
+    def _parse_single_pass(self, content: str) -> Tuple[RequirementExtraction, Dict[str, str]]:
+        content = content.strip()
+        if content.startswith("```"):
+            content = content.strip("`").removeprefix("json").strip()
+        data = json.loads(content)
+        requirements = RequirementExtraction(**data["requirements"])
+        templates = {key: data[key] for key in ("reply_found", "reply_none") if isinstance(data.get(key), str)}
+        return requirements, templates
+    
+    def _single_pass_reply(self, 
+                           templates: Optional[Dict[str, str]],
+                           requirements: RequirementExtraction,
+                           matching_products: List[ProductMatch],
+                           language: str) -> str:
+        """Fill the LLM's reply template with the matched product details"""
+        key = "reply_found" if matching_products else "reply_none"
+        if templates and templates.get(key):
+            best = matching_products[0] if matching_products else None
+            values = TemplateValues(
+                count=len(matching_products),
+                product_name=requirements.product_name,
+                quantity=f"{requirements.quantity:g}",
+                unit=requirements.unit,
+                budget=f"{requirements.budget:g}" if requirements.budget else "",
+                best_supplier=best.supplier_name if best else "",
+                best_price=best.price_per_unit if best else "",
+                best_total=best.total_cost if best else "",
+                best_distance=best.distance_km if best else ""
+            )
+            try:
+                return templates[key].format_map(values)
+            except (ValueError, IndexError, AttributeError):
+                pass  # Malformed template
+        
+        current_lang = self._language_prompts(requirements, "", matching_products, language)
+        return current_lang["found_suppliers"] if matching_products else current_lang["no_results"]
+    
+    def _context_query(self, requirements: RequirementExtraction, message: str) -> str:
+        """Knowledge base query: the product plus the vendor's own words, not quantities or language"""
+        return " ".join(part for part in (requirements.product_name, message) if part).strip()
+    
+    def _language_prompts(self, 
+                          requirements: RequirementExtraction, 
+                          context: str,
+                          matching_products: List[ProductMatch],
+                          language: str) -> Dict[str, str]:
+        """Reply prompt and canned messages for a language"""
         # Generate response based on language
         language_prompts = {
             "hindi": {
@@ -222,19 +581,31 @@ class VendorGPTAgent:
             }
         }
         
-        current_lang = language_prompts.get(language, language_prompts["english"])
-        
-        if matching_products:
-            messages = [
-                SystemMessage(content=current_lang["system"]),
-                HumanMessage(content=message)
-            ]
-            
-            response = self.llm(messages)
-            bot_response = response.content
-        else:
-            bot_response = current_lang["no_results"]
-        
+        return language_prompts.get(language, language_prompts["english"])
+    
+    def _reply_messages(self,
+                        current_lang: Dict[str, str],
+                        message: str,
+                        history: Optional[ConversationHistory] = None) -> List[Any]:
+        return self._with_history(current_lang["system"], message, history)
+    
+    def _with_history(self, system_prompt: str, message: str, history: Optional[ConversationHistory]) -> List[Any]:
+        """System prompt, the bounded conversation so far, then the new message"""
+        if history and history.summary:
+            # Gemini only accepts one leading system message
+            system_prompt = f"{system_prompt}\n\nEarlier in this conversation:\n{history.summary}"
+        messages = [SystemMessage(content=system_prompt)]
+        for turn in (history.turns if history else []):
+            messages.append(HumanMessage(content=turn.content) if turn.role == "user" else AIMessage(content=turn.content))
+        messages.append(HumanMessage(content=message))
+        return messages
+    
+    def _build_chat_response(self, 
+                             bot_response: str,
+                             requirements: RequirementExtraction,
+                             matching_products: List[ProductMatch],
+                             language: str,
+                             generation_mode: str = "two_pass") -> ChatResponse:
         # Generate suggestions
         suggestions = self._generate_suggestions(requirements, matching_products, language)
         
@@ -243,7 +614,8 @@ class VendorGPTAgent:
             suggestions=suggestions,
             products=[self._format_product_for_response(p) for p in matching_products],
             requires_clarification=len(matching_products) == 0,
-            extracted_requirements=requirements.dict()
+            extracted_requirements=requirements.dict(),
+            generation_mode=generation_mode
         )
     
     def _find_matching_products(self, 
@@ -257,31 +629,11 @@ class VendorGPTAgent:
         if not vendor:
             return []
         
-        # Build query
-        query = db.query(Product, Supplier).join(Supplier, Product.supplier_id == Supplier.id)
-        
-        # Filter by product name (fuzzy matching)
-        if requirements.product_name and requirements.product_name != "vegetables":
-            search_terms = requirements.product_name.split()
-            for term in search_terms:
-                query = query.filter(Product.name.ilike(f"%{term}%"))
-        
-        # Filter by availability
-        query = query.filter(
-            and_(
-                Product.is_available == True,
-                Supplier.is_active == True,
-                Product.available_quantity >= requirements.quantity,
-                Product.minimum_order_quantity <= requirements.quantity
-            )
-        )
-        
-        # Filter by budget if specified
-        if requirements.budget and requirements.budget > 0:
-            max_price_per_unit = requirements.budget / requirements.quantity
-            query = query.filter(Product.price_per_unit <= max_price_per_unit)
-        
-        results = query.all()
+        product_ids = self._semantic_product_ids(requirements)
+        if settings.catalog_snapshot_enabled:
+            results = self._catalog_candidates(requirements, vendor, db, product_ids)
+        else:
+            results = self._query_candidates(requirements, vendor, db, product_ids)
         
         # Format and filter by distance
         matching_products = []
@@ -291,7 +643,7 @@ class VendorGPTAgent:
                 supplier.latitude, supplier.longitude
             ) if all([vendor.latitude, vendor.longitude, supplier.latitude, supplier.longitude]) else 5.0
             
-            if distance <= 25:  # 25km radius
+            if distance <= self.max_distance_km:
                 total_cost = product.price_per_unit * requirements.quantity
                 
                 product_match = ProductMatch(
@@ -318,6 +670,87 @@ class VendorGPTAgent:
         
         return matching_products[:5]  # Return top 5 matches
     
+    def _semantic_product_ids(self, requirements: RequirementExtraction) -> Optional[List[int]]:
+        """Candidate ids from the product embedding index, or None to fall back to name matching"""
+        if not settings.semantic_product_search_enabled:
+            return None
+        if not requirements.product_name or requirements.product_name == "vegetables":
+            return None
+        
+        try:
+            return product_index.search(
+                requirements.product_name,
+                k=settings.product_search_k,
+                min_score=settings.product_search_min_score
+            ) or None
+        except Exception as e:
+            print(f"Semantic product search failed: {e}")
+            return None
+    
+    def _query_candidates(self, 
+                          requirements: RequirementExtraction, 
+                          vendor: Vendor, 
+                          db: Session,
+                          product_ids: Optional[List[int]] = None) -> List[Any]:
+        """Fetch (Product, Supplier) candidates from the database"""
+        query = db.query(Product, Supplier).join(Supplier, Product.supplier_id == Supplier.id)
+        
+        if product_ids:
+            query = query.filter(Product.id.in_(product_ids))
+        # Filter by product name (fuzzy matching)
+        elif requirements.product_name and requirements.product_name != "vegetables":
+            search_terms = requirements.product_name.split()
+            for term in search_terms:
+                query = query.filter(contains(Product.name, term))
+        
+        # Filter by availability
+        query = query.filter(
+            and_(
+                Product.is_available == True,
+                Supplier.is_active == True,
+                Product.available_quantity >= requirements.quantity,
+                Product.minimum_order_quantity <= requirements.quantity
+            )
+        )
+        
+        # Filter by budget if specified
+        if requirements.budget and requirements.budget > 0:
+            max_price_per_unit = requirements.budget / requirements.quantity
+            query = query.filter(Product.price_per_unit <= max_price_per_unit)
+        
+        # Only fetch suppliers that can be inside the search radius
+        query = apply_proximity_filter(
+            query, vendor.latitude, vendor.longitude, self.max_distance_km, db
+        )
+        
+        return query.all()
+    
+    def _catalog_candidates(self, 
+                            requirements: RequirementExtraction, 
+                            vendor: Vendor, 
+                            db: Session,
+                            product_ids: Optional[List[int]] = None) -> List[Any]:
+        """Serve (product, supplier) candidates from the in-process catalog snapshot"""
+        product_catalog.ensure_loaded(db)
+        
+        # Semantic candidates, when available, replace name matching
+        name_terms = None
+        if not product_ids and requirements.product_name and requirements.product_name != "vegetables":
+            name_terms = requirements.product_name.split()
+        
+        max_price = None
+        if requirements.budget and requirements.budget > 0:
+            max_price = requirements.budget / requirements.quantity
+        
+        view = product_catalog.query(
+            name_terms=name_terms,
+            product_ids=product_ids,
+            min_available=requirements.quantity,
+            max_minimum_order=requirements.quantity,
+            max_price=max_price
+        )
+        return view.within(vendor.latitude, vendor.longitude, self.max_distance_km).rows()
+    
     def _calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate distance between two coordinates using Haversine formula"""
         if not all([lat1, lon1, lat2, lon2]):
@@ -404,3 +837,14 @@ class VendorGPTAgent:
             "total_cost": product.total_cost,
             "phone": product.phone
         }
+
+_agent: Optional[VendorGPTAgent] = None
+_agent_lock = threading.Lock()
+
+def get_agent() -> VendorGPTAgent:
+    """Process-wide agent, shared by the API routes and background workers"""
+    global _agent
+    with _agent_lock:
+        if _agent is None:
+            _agent = VendorGPTAgent()
+        return _agent
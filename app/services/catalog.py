@@ -0,0 +1,329 @@
+
+import threading
+import time
+from collections import defaultdict, namedtuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..models.product import Product
+from ..models.user import Supplier
+from ..config.settings import settings
+from ..utils.geo_utils import has_coordinates, haversine_km_array, DEFAULT_DISTANCE_KM
+
+# Row views exposing the same attribute names as the ORM models, so code that
+# formats (Product, Supplier) query results also works on snapshot rows
+ProductRow = namedtuple("ProductRow", [
+    "id", "supplier_id", "name", "category", "price_per_unit", "unit_type",
+    "minimum_order_quantity", "available_quantity", "quality_score",
+    "description", "image_urls", "is_available"
+])
+SupplierRow = namedtuple("SupplierRow", [
+    "id", "name", "business_name", "phone", "location",
+    "latitude", "longitude", "trust_score", "is_active"
+])
+
+_FLOAT_COLUMNS = ("price", "min_order", "available", "quality", "supplier_lat", "supplier_lon", "supplier_trust")
+_INT_COLUMNS = ("product_id", "supplier_id")
+_BOOL_COLUMNS = ("live", "is_available", "supplier_active")
+_OBJECT_COLUMNS = ("name", "category", "unit_type", "description", "image_urls")
+
+class CatalogView:
+    """Columns for a filtered subset of the catalog, copied out of the snapshot"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], objects: Dict[str, List], suppliers: Dict[int, SupplierRow]):
+        self.columns = columns
+        self.objects = objects
+        self._suppliers = suppliers
+
+    def __len__(self) -> int:
+        return len(self.columns["product_id"])
+
+    def within(self, latitude: Optional[float], longitude: Optional[float], radius_km: float) -> "CatalogView":
+        """Keep rows whose supplier is within radius_km, using the default distance for unlocated rows"""
+        distances = self.distances_from(latitude, longitude)
+        return self.take(np.flatnonzero(distances <= radius_km))
+
+    def distances_from(self, latitude: Optional[float], longitude: Optional[float]) -> np.ndarray:
+        """Vectorized distance from a point to every row's supplier"""
+        latitudes = self.columns["supplier_lat"]
+        longitudes = self.columns["supplier_lon"]
+        distances = np.full(latitudes.shape, DEFAULT_DISTANCE_KM)
+        if has_coordinates(latitude, longitude):
+            located = (latitudes != 0) & (longitudes != 0)
+            distances[located] = haversine_km_array(latitude, longitude, latitudes[located], longitudes[located])
+        return distances
+
+    def take(self, indices: np.ndarray) -> "CatalogView":
+        """Return a view over a subset of rows"""
+        return CatalogView(
+            {key: column[indices] for key, column in self.columns.items()},
+            {key: [values[i] for i in indices] for key, values in self.objects.items()},
+            self._suppliers
+        )
+
+    def row(self, i: int) -> Tuple[ProductRow, SupplierRow]:
+        """Materialize one row as (product, supplier)"""
+        columns = self.columns
+        product = ProductRow(
+            id=int(columns["product_id"][i]),
+            supplier_id=int(columns["supplier_id"][i]),
+            name=self.objects["name"][i],
+            category=self.objects["category"][i],
+            price_per_unit=float(columns["price"][i]),
+            unit_type=self.objects["unit_type"][i],
+            minimum_order_quantity=float(columns["min_order"][i]),
+            available_quantity=float(columns["available"][i]),
+            quality_score=float(columns["quality"][i]),
+            description=self.objects["description"][i],
+            image_urls=self.objects["image_urls"][i],
+            is_available=bool(columns["is_available"][i])
+        )
+        return product, self._suppliers[product.supplier_id]
+
+    def rows(self) -> List[Tuple[ProductRow, SupplierRow]]:
+        """Materialize every row as (product, supplier) pairs"""
+        return [self.row(i) for i in range(len(self))]
+
+class ProductCatalog:
+    """In-process snapshot of the products/suppliers join.
+
+    Products live in slot-indexed NumPy columns (supplier location, trust and
+    status are denormalized onto each product slot) with lowercase name and
+    category indexes, so matching can filter and score candidates without a
+    database round trip. Write paths call the upsert methods after committing;
+    the whole snapshot is also rebuilt periodically to pick up writes made by
+    other worker processes.
+    """
+
+    def __init__(self, refresh_seconds: int = 300, initial_capacity: int = 1024):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._reset(initial_capacity)
+
+    def _reset(self, capacity: int):
+        self._capacity = max(capacity, 1)
+        self._size = 0
+        self._columns: Dict[str, np.ndarray] = {}
+        for key in _FLOAT_COLUMNS:
+            self._columns[key] = np.zeros(self._capacity, dtype=np.float64)
+        for key in _INT_COLUMNS:
+            self._columns[key] = np.zeros(self._capacity, dtype=np.int64)
+        for key in _BOOL_COLUMNS:
+            self._columns[key] = np.zeros(self._capacity, dtype=bool)
+        self._objects: Dict[str, List] = {key: [None] * self._capacity for key in _OBJECT_COLUMNS}
+        self._slot_of: Dict[int, int] = {}
+        self._free_slots: List[int] = []
+        self._supplier_slots: Dict[int, Set[int]] = defaultdict(set)
+        self._suppliers: Dict[int, SupplierRow] = {}
+        self._name_index: Dict[str, Set[int]] = defaultdict(set)
+        self._category_index: Dict[str, Set[int]] = defaultdict(set)
+
+    def load(self, db: Session):
+        """Rebuild the snapshot from the database"""
+        suppliers = db.query(Supplier).all()
+        products = db.query(Product).all()
+        with self._lock:
+            self._reset(max(len(products) * 2, 1024))
+            for supplier in suppliers:
+                self._store_supplier(supplier)
+            for product in products:
+                self._store_product(product)
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session):
+        """Load on first use and rebuild once the snapshot is older than refresh_seconds"""
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.refresh_seconds:
+            self.load(db)
+
+    def upsert_supplier(self, supplier: Supplier):
+        """Add or update a supplier and its denormalized product columns"""
+        with self._lock:
+            if self._loaded_at is not None:
+                self._store_supplier(supplier)
+
+    def upsert_product(self, product: Product):
+        """Add or update a product after it has been committed"""
+        with self._lock:
+            if self._loaded_at is None:
+                return  # Nothing to keep current until the first full load
+            if product.supplier_id not in self._suppliers:
+                self._store_supplier(product.supplier)
+            self._store_product(product)
+
+    def upsert_products(self, products: Iterable[Product]):
+        """Add or update several committed products"""
+        with self._lock:
+            for product in products:
+                self.upsert_product(product)
+
+    def set_available_quantity(self, product_id: int, quantity: float):
+        """Update a product's stock after a committed reservation"""
+        with self._lock:
+            slot = self._slot_of.get(product_id)
+            if slot is not None:
+                self._columns["available"][slot] = quantity
+
+    def remove_product(self, product_id: int):
+        """Drop a product from the snapshot"""
+        with self._lock:
+            slot = self._slot_of.pop(product_id, None)
+            if slot is not None:
+                self._release_slot(slot)
+
+    def query(self,
+              name_terms: Optional[List[str]] = None,
+              match_all_terms: bool = True,
+              include_category: bool = False,
+              min_available: Optional[float] = None,
+              max_minimum_order: Optional[float] = None,
+              max_price: Optional[float] = None,
+              min_quality: Optional[float] = None,
+              product_ids: Optional[Iterable[int]] = None) -> CatalogView:
+        """Select available products from active suppliers matching the given filters.
+
+        Name terms follow the SQL matchers' `ilike '%term%'` semantics: with
+        match_all_terms every term must appear in the name, otherwise any term
+        may appear in the name (or category, with include_category).
+        """
+        with self._lock:
+            size = self._size
+            columns = self._columns
+            mask = columns["live"][:size] & columns["is_available"][:size] & columns["supplier_active"][:size]
+
+            if name_terms:
+                mask &= self._term_mask(name_terms, match_all_terms, include_category, size)
+            if product_ids is not None:
+                id_mask = np.zeros(size, dtype=bool)
+                for product_id in product_ids:
+                    slot = self._slot_of.get(product_id)
+                    if slot is not None:
+                        id_mask[slot] = True
+                mask &= id_mask
+            if min_available is not None:
+                mask &= columns["available"][:size] >= min_available
+            if max_minimum_order is not None:
+                mask &= columns["min_order"][:size] <= max_minimum_order
+            if max_price is not None:
+                mask &= columns["price"][:size] <= max_price
+            if min_quality is not None:
+                mask &= columns["quality"][:size] >= min_quality
+
+            slots = np.flatnonzero(mask)
+            supplier_ids = set(columns["supplier_id"][slots].tolist())
+            return CatalogView(
+                {key: column[slots] for key, column in columns.items()},
+                {key: [values[i] for i in slots] for key, values in self._objects.items()},
+                {supplier_id: self._suppliers[supplier_id] for supplier_id in supplier_ids}
+            )
+
+    def _term_mask(self, terms: List[str], match_all_terms: bool, include_category: bool, size: int) -> np.ndarray:
+        mask = np.full(size, match_all_terms, dtype=bool)
+        for term in terms:
+            term = term.lower()
+            term_mask = np.zeros(size, dtype=bool)
+            indexes = [self._name_index, self._category_index] if include_category else [self._name_index]
+            for index in indexes:
+                # Substring match over distinct values, far fewer than product rows
+                for value, slots in index.items():
+                    if term in value:
+                        term_mask[list(slots)] = True
+            if match_all_terms:
+                mask &= term_mask
+            else:
+                mask |= term_mask
+        return mask
+
+    def _store_supplier(self, supplier: Supplier):
+        record = SupplierRow(
+            id=supplier.id,
+            name=supplier.name,
+            business_name=supplier.business_name,
+            phone=supplier.phone,
+            location=supplier.location,
+            latitude=supplier.latitude,
+            longitude=supplier.longitude,
+            trust_score=supplier.trust_score or 0.0,
+            is_active=bool(supplier.is_active)
+        )
+        self._suppliers[supplier.id] = record
+        for slot in self._supplier_slots.get(supplier.id, ()):
+            self._write_supplier_columns(slot, record)
+
+    def _store_product(self, product: Product):
+        slot = self._slot_of.get(product.id)
+        if slot is None:
+            slot = self._allocate_slot()
+            self._slot_of[product.id] = slot
+        else:
+            self._unindex(slot)
+
+        columns = self._columns
+        columns["live"][slot] = True
+        columns["product_id"][slot] = product.id
+        columns["supplier_id"][slot] = product.supplier_id
+        columns["price"][slot] = product.price_per_unit
+        columns["min_order"][slot] = product.minimum_order_quantity or 0.0
+        columns["available"][slot] = product.available_quantity or 0.0
+        columns["quality"][slot] = product.quality_score or 0.0
+        columns["is_available"][slot] = bool(product.is_available)
+        self._objects["name"][slot] = product.name
+        self._objects["category"][slot] = product.category
+        self._objects["unit_type"][slot] = product.unit_type
+        self._objects["description"][slot] = product.description
+        self._objects["image_urls"][slot] = product.image_urls
+
+        self._supplier_slots[product.supplier_id].add(slot)
+        self._write_supplier_columns(slot, self._suppliers.get(product.supplier_id))
+        self._name_index[product.name.lower()].add(slot)
+        if product.category:
+            self._category_index[product.category.lower()].add(slot)
+
+    def _write_supplier_columns(self, slot: int, record: Optional[SupplierRow]):
+        columns = self._columns
+        columns["supplier_lat"][slot] = (record.latitude or 0.0) if record else 0.0
+        columns["supplier_lon"][slot] = (record.longitude or 0.0) if record else 0.0
+        columns["supplier_trust"][slot] = record.trust_score if record else 0.0
+        columns["supplier_active"][slot] = record.is_active if record else False
+
+    def _allocate_slot(self) -> int:
+        if self._free_slots:
+            return self._free_slots.pop()
+        if self._size == self._capacity:
+            self._grow()
+        slot = self._size
+        self._size += 1
+        return slot
+
+    def _grow(self):
+        new_capacity = self._capacity * 2
+        for key, column in self._columns.items():
+            grown = np.zeros(new_capacity, dtype=column.dtype)
+            grown[:self._capacity] = column
+            self._columns[key] = grown
+        for values in self._objects.values():
+            values.extend([None] * (new_capacity - self._capacity))
+        self._capacity = new_capacity
+
+    def _release_slot(self, slot: int):
+        self._unindex(slot)
+        self._columns["live"][slot] = False
+        for values in self._objects.values():
+            values[slot] = None
+        self._free_slots.append(slot)
+
+    def _unindex(self, slot: int):
+        supplier_id = int(self._columns["supplier_id"][slot])
+        self._supplier_slots.get(supplier_id, set()).discard(slot)
+        for index, key in ((self._name_index, "name"), (self._category_index, "category")):
+            value = self._objects[key][slot]
+            if value:
+                members = index.get(value.lower())
+                if members is not None:
+                    members.discard(slot)
+                    if not members:
+                        del index[value.lower()]
+
+product_catalog = ProductCatalog(refresh_seconds=settings.catalog_refresh_seconds)
@@ -0,0 +1,175 @@
+
+import json
+import uuid
+from typing import List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..config.settings import settings
+from ..models.chat import ChatSession, ChatMessage
+from ..schemas.chat import ChatResponse, ConversationHistory, ConversationTurn
+
+def get_or_create_session(db: Session, vendor_id: int) -> ChatSession:
+    """The vendor's active chat session, created on first use"""
+    session = db.query(ChatSession).filter(
+        ChatSession.vendor_id == vendor_id,
+        ChatSession.status == "active"
+    ).first()
+
+    if not session:
+        session = ChatSession(
+            vendor_id=vendor_id,
+            session_id=str(uuid.uuid4()),
+            status="active"
+        )
+        db.add(session)
+        db.commit()
+        db.refresh(session)
+    return session
+
+def save_user_message(db: Session, session_id: int, message: str) -> ChatMessage:
+    user_message = ChatMessage(
+        session_id=session_id,
+        message_type="user",
+        message_content=message,
+        is_processed=False
+    )
+    db.add(user_message)
+    db.commit()
+    db.refresh(user_message)
+    return user_message
+
+def save_bot_message(db: Session,
+                     session_id: int,
+                     ai_response: ChatResponse,
+                     reply_to_id: Optional[int] = None) -> ChatMessage:
+    bot_message = ChatMessage(
+        session_id=session_id,
+        message_type="bot",
+        message_content=ai_response.response,
+        extracted_requirements=json.dumps(ai_response.extracted_requirements, ensure_ascii=False),
+        suggested_products=json.dumps(ai_response.products, ensure_ascii=False),
+        generation_mode=ai_response.generation_mode,
+        reply_to_id=reply_to_id,
+        is_processed=True
+    )
+    db.add(bot_message)
+    if reply_to_id is not None:
+        db.query(ChatMessage).filter(ChatMessage.id == reply_to_id).update({"is_processed": True})
+    db.commit()
+    # Keeps the next turn's history bounded; the reply is already saved, so a
+    # failure here must not fail the turn
+    try:
+        compact_history(db, session_id)
+    except Exception as e:
+        db.rollback()
+        print(f"Chat history compaction failed for session {session_id}: {e}")
+    return bot_message
+
+def response_from_message(bot_message: ChatMessage) -> ChatResponse:
+    """Rebuild a ChatResponse from a stored bot message"""
+    products = json.loads(bot_message.suggested_products) if bot_message.suggested_products else []
+    return ChatResponse(
+        response=bot_message.message_content,
+        products=products,
+        requires_clarification=len(products) == 0,
+        extracted_requirements=json.loads(bot_message.extracted_requirements) if bot_message.extracted_requirements else None,
+        generation_mode=bot_message.generation_mode
+    )
+
+def load_history(db: Session,
+                 session_id: int,
+                 before_id: Optional[int] = None,
+                 max_turns: Optional[int] = None) -> ConversationHistory:
+    """Rolling summary plus the most recent messages, for the agent's prompt"""
+    max_turns = settings.chat_memory_turns if max_turns is None else max_turns
+    session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+    if session is None:
+        return ConversationHistory()
+
+    query = _unsummarized(db, session)
+    if before_id is not None:
+        query = query.filter(ChatMessage.id < before_id)
+    recent = query.order_by(ChatMessage.id.desc()).limit(2 * max_turns).all()
+    return ConversationHistory(
+        summary=session.summary,
+        turns=[ConversationTurn(role=m.message_type, content=m.message_content) for m in reversed(recent)]
+    )
+
+def compact_history(db: Session,
+                    session_id: int,
+                    max_turns: Optional[int] = None,
+                    max_chars: Optional[int] = None):
+    """Fold messages older than the last max_turns turns into the session summary"""
+    max_turns = settings.chat_memory_turns if max_turns is None else max_turns
+    max_chars = settings.chat_summary_max_chars if max_chars is None else max_chars
+    session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+    if session is None:
+        return
+
+    # Bounded read: at most one window of messages is folded per call. Older
+    # unsummarized rows (sessions from before summaries existed) are skipped.
+    window = _unsummarized(db, session).order_by(ChatMessage.id.desc()).limit(4 * max_turns).all()
+    older = list(reversed(window[2 * max_turns:]))
+    if not older:
+        return
+
+    lines = session.summary.split("\n") if session.summary else []
+    lines.extend(line for line in (_summary_line(m) for m in older) if line)
+    while lines and len("\n".join(lines)) > max_chars:
+        lines.pop(0)
+
+    # Only advance from the state that was read, so concurrent turns never fold twice
+    db.query(ChatSession).filter(
+        ChatSession.id == session_id,
+        func.coalesce(ChatSession.summarized_until_id, 0) == (session.summarized_until_id or 0)
+    ).update({"summary": "\n".join(lines), "summarized_until_id": older[-1].id}, synchronize_session=False)
+    db.commit()
+
+def _unsummarized(db: Session, session: ChatSession):
+    query = db.query(ChatMessage).filter(
+        ChatMessage.session_id == session.id,
+        ChatMessage.message_type.in_(["user", "bot"])
+    )
+    if session.summarized_until_id is not None:
+        query = query.filter(ChatMessage.id > session.summarized_until_id)
+    return query
+
+def _json_field(value: Optional[str], expected: type):
+    """A stored JSON column, empty if unset or null; None if it is not valid JSON of the expected type"""
+    if not value:
+        return expected()
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return None
+    if parsed is None:
+        return expected()
+    return parsed if isinstance(parsed, expected) else None
+
+def _summary_line(message: ChatMessage, max_chars: int = 100) -> str:
+    """One compressed line per message; bot replies are described by what they offered"""
+    if message.message_type == "user":
+        content = " ".join(message.message_content.split())
+        return "Vendor: " + (content if len(content) <= max_chars else content[:max_chars - 3] + "...")
+
+    requirements = _json_field(message.extracted_requirements, dict)
+    products: List[dict] = _json_field(message.suggested_products, list)
+    if requirements is None or products is None:
+        # Rows from before these fields were stored as JSON
+        content = " ".join(message.message_content.split())
+        return "Bot: " + (content if len(content) <= max_chars else content[:max_chars - 3] + "...")
+
+    product_name = requirements.get("product_name")
+    if not product_name:
+        return "Bot: asked for clarification"
+
+    quantity = requirements.get("quantity")
+    wanted = f"{quantity:g} {requirements.get('unit', '')} {product_name}" if quantity else product_name
+    if requirements.get("budget"):
+        wanted += f" (budget ₹{requirements['budget']:g})"
+    if not products:
+        return f"Bot: found no suppliers for {wanted}"
+    best = products[0]
+    return (f"Bot: offered {len(products)} suppliers for {wanted}; best {best.get('supplier_name')} "
+            f"at ₹{best.get('price_per_unit')}/{best.get('unit_type')}")
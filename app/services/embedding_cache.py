@@ -0,0 +1,199 @@
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+from ..config.settings import settings
+
+class CachedEmbeddings(Embeddings):
+    """Content-addressed cache in front of an embeddings client.
+
+    Vectors are keyed by a hash of model, kind (query/document, since the
+    provider embeds them differently) and text. Lookups go through a small
+    in-memory LRU, then an on-disk SQLite store shared by all workers on the
+    host; only misses reach the network, and each distinct miss in a batch
+    is embedded once. The disk store evicts least recently used entries once
+    it grows past max_entries.
+    """
+
+    def __init__(self,
+                 underlying: Embeddings,
+                 model: str,
+                 cache_path: str,
+                 max_entries: int = 100_000,
+                 memory_entries: int = 2048):
+        self.underlying = underlying
+        self.model = model
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "evictions": 0}
+        self._db = self._open(cache_path)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key("document", text) for text in texts]
+        found = self._lookup(keys)
+        missing = self._missing(texts, keys, found)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            self._store(dict(zip(missing.keys(), vectors)), found)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        found = self._lookup([key])
+        if key not in found:
+            self._store({key: self.underlying.embed_query(text)}, found)
+        return found[key]
+
+    # The async variants run the SQLite reads and writes on a worker thread
+    # so a slow disk or a busy writer does not stall the event loop
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key("document", text) for text in texts]
+        found = await asyncio.to_thread(self._lookup, keys)
+        missing = self._missing(texts, keys, found)
+        if missing:
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            await asyncio.to_thread(self._store, dict(zip(missing.keys(), vectors)), found)
+        return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        found = await asyncio.to_thread(self._lookup, [key])
+        if key not in found:
+            vector = await self.underlying.aembed_query(text)
+            await asyncio.to_thread(self._store, {key: vector}, found)
+        return found[key]
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters plus current cache sizes"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_size"] = len(self._memory)
+            stats["disk_size"] = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _key(self, kind: str, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def _missing(self, texts: List[str], keys: List[str], found: Dict[str, List[float]]) -> Dict[str, str]:
+        """Distinct uncached texts keyed by cache key, in first-seen order"""
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        return missing
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            disk_keys = []
+            for key in set(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self._counters["memory_hits"] += 1
+                else:
+                    disk_keys.append(key)
+
+            if disk_keys:
+                placeholders = ",".join("?" * len(disk_keys))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", disk_keys
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32).tolist()
+                    found[key] = vector
+                    self._remember(key, vector)
+                self._counters["disk_hits"] += len(rows)
+                if rows:
+                    self._db.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(time.time(), key) for key, _ in rows]
+                    )
+                    self._db.commit()
+
+            hits = sum(1 for key in keys if key in found)
+            self._counters["hits"] += hits
+            self._counters["misses"] += len(keys) - hits
+        return found
+
+    def _store(self, vectors: Dict[str, List[float]], found: Dict[str, List[float]]):
+        now = time.time()
+        with self._lock:
+            for key, vector in vectors.items():
+                found[key] = vector
+                self._remember(key, vector)
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in vectors.items()]
+            )
+            self._evict()
+            self._db.commit()
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            # Trim a little extra so eviction does not run on every insert
+            excess += self.max_entries // 10
+            self._db.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,)
+            )
+            self._counters["evictions"] += min(excess, count)
+
+    @staticmethod
+    def _open(cache_path: str) -> sqlite3.Connection:
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(cache_path, check_same_thread=False, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        db.commit()
+        return db
+
+_shared_embeddings: Optional[CachedEmbeddings] = None
+_shared_lock = threading.Lock()
+
+def get_embeddings() -> CachedEmbeddings:
+    """Process-wide cached embeddings client for the configured model"""
+    global _shared_embeddings
+    with _shared_lock:
+        if _shared_embeddings is None:
+            _shared_embeddings = CachedEmbeddings(
+                GoogleGenerativeAIEmbeddings(
+                    model=settings.embedding_model,
+                    google_api_key=settings.google_api_key
+                ),
+                model=settings.embedding_model,
+                cache_path=settings.embedding_cache_path,
+                max_entries=settings.embedding_cache_max_entries,
+                memory_entries=settings.embedding_cache_memory_entries
+            )
+        return _shared_embeddings
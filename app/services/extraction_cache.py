@@ -0,0 +1,164 @@
+
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import redis
+
+from ..schemas.chat import RequirementExtraction
+from ..config.settings import settings
+
+# Bump when the extraction prompt changes so stale results are not served
+EXTRACTION_CACHE_VERSION = 1
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?,।]+$")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_message(message: str) -> str:
+    """Canonical form of a vendor message for cache lookups"""
+    text = unicodedata.normalize("NFKC", message).lower().strip()
+    text = _TRAILING_PUNCTUATION.sub("", text)
+    return _WHITESPACE.sub(" ", text)
+
+class MemoryExtractionBackend:
+    """In-process LRU store with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+class RedisExtractionBackend:
+    """Redis store shared by all workers.
+
+    Entries expire through Redis TTLs; a sorted set of keys by write time
+    caps the number of entries, evicting the oldest first.
+    """
+
+    def __init__(self, url: str, max_entries: int = 10000, prefix: str = "vendorgpt:extraction"):
+        self.client = redis.Redis.from_url(url, decode_responses=True, socket_timeout=0.5)
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self.index_key = f"{prefix}:index"
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(f"{self.prefix}:{key}")
+
+    def set(self, key: str, value: str, ttl: int):
+        pipe = self.client.pipeline()
+        pipe.setex(f"{self.prefix}:{key}", ttl, value)
+        pipe.zadd(self.index_key, {key: time.time()})
+        pipe.zcard(self.index_key)
+        count = pipe.execute()[-1]
+
+        excess = count - self.max_entries
+        if excess > 0:
+            evicted = [member for member, _ in self.client.zpopmin(self.index_key, excess)]
+            if evicted:
+                self.client.delete(*[f"{self.prefix}:{member}" for member in evicted])
+                self.evictions += len(evicted)
+
+    def size(self) -> int:
+        return self.client.zcard(self.index_key)
+
+class ExtractionCache:
+    """Cache of LLM requirement extractions keyed by normalized message and language.
+
+    Backend failures are counted and treated as misses so the chat keeps
+    working when Redis is unavailable.
+    """
+
+    def __init__(self, backend, ttl_seconds: int = 86400):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    def key(self, message: str, language: str) -> str:
+        payload = f"{EXTRACTION_CACHE_VERSION}\0{language}\0{normalize_message(message)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, message: str, language: str) -> Optional[RequirementExtraction]:
+        try:
+            value = self.backend.get(self.key(message, language))
+        except Exception as e:
+            self._counters["errors"] += 1
+            print(f"Extraction cache read failed: {e}")
+            value = None
+
+        if value is None:
+            self._counters["misses"] += 1
+            return None
+        self._counters["hits"] += 1
+        return RequirementExtraction(**json.loads(value))
+
+    def set(self, message: str, language: str, requirements: RequirementExtraction):
+        try:
+            self.backend.set(self.key(message, language), json.dumps(requirements.dict()), self.ttl_seconds)
+            self._counters["stores"] += 1
+        except Exception as e:
+            self._counters["errors"] += 1
+            print(f"Extraction cache write failed: {e}")
+
+    async def aget(self, message: str, language: str) -> Optional[RequirementExtraction]:
+        """get on a worker thread, since the Redis client blocks"""
+        return await asyncio.to_thread(self.get, message, language)
+
+    async def aset(self, message: str, language: str, requirements: RequirementExtraction):
+        """set on a worker thread, since the Redis client blocks"""
+        await asyncio.to_thread(self.set, message, language, requirements)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters plus backend size"""
+        stats = dict(self._counters)
+        stats["backend"] = type(self.backend).__name__
+        stats["evictions"] = self.backend.evictions
+        try:
+            stats["size"] = self.backend.size()
+        except Exception:
+            stats["size"] = None
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+def build_extraction_cache() -> Optional[ExtractionCache]:
+    """Extraction cache for the configured backend, or None when disabled"""
+    backend_name = settings.extraction_cache_backend.lower()
+    if backend_name == "redis":
+        backend = RedisExtractionBackend(settings.redis_url, settings.extraction_cache_max_entries)
+    elif backend_name == "memory":
+        backend = MemoryExtractionBackend(settings.extraction_cache_max_entries)
+    else:
+        return None
+    return ExtractionCache(backend, settings.extraction_cache_ttl_seconds)
+
+extraction_cache = build_extraction_cache()
@@ -0,0 +1,119 @@
+
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
+
+from ..models.user import Supplier
+from ..config.settings import settings
+from ..utils.geo_utils import has_coordinates, haversine_km, bounding_box, grid_cell, cells_within
+
+class SupplierGeoIndex:
+    """In-process grid index over supplier coordinates.
+
+    Suppliers are bucketed into fixed-size lat/lon cells so a radius lookup
+    only visits the cells overlapping the vendor's search circle instead of
+    every supplier row. Suppliers without coordinates are always returned,
+    since the matchers treat them as being at the default distance.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.1, refresh_seconds: int = 300):
+        self.cell_size_deg = cell_size_deg
+        self.refresh_seconds = refresh_seconds
+        self._cells: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        self._positions: Dict[int, Tuple[float, float]] = {}
+        self._unlocated: Set[int] = set()
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+
+    def upsert(self, supplier_id: int, latitude: Optional[float], longitude: Optional[float]):
+        """Add a supplier or move it to its current cell"""
+        with self._lock:
+            self._discard(supplier_id)
+            if has_coordinates(latitude, longitude):
+                self._positions[supplier_id] = (latitude, longitude)
+                self._cells[grid_cell(latitude, longitude, self.cell_size_deg)].add(supplier_id)
+            else:
+                self._unlocated.add(supplier_id)
+
+    def remove(self, supplier_id: int):
+        """Drop a supplier from the index"""
+        with self._lock:
+            self._discard(supplier_id)
+
+    def load(self, db: Session):
+        """Rebuild the index from the suppliers table"""
+        rows = db.query(Supplier.id, Supplier.latitude, Supplier.longitude).all()
+        with self._lock:
+            self._cells.clear()
+            self._positions.clear()
+            self._unlocated.clear()
+            for supplier_id, latitude, longitude in rows:
+                self.upsert(supplier_id, latitude, longitude)
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session):
+        """Load on first use and periodically rebuild to pick up writes from other workers"""
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.refresh_seconds:
+            self.load(db)
+
+    def candidates_within(self, latitude: float, longitude: float, radius_km: float) -> Set[int]:
+        """Return ids of suppliers that can be within radius_km of a point"""
+        with self._lock:
+            candidates = set(self._unlocated)
+            for cell in cells_within(latitude, longitude, radius_km, self.cell_size_deg):
+                for supplier_id in self._cells.get(cell, ()):
+                    supplier_lat, supplier_lon = self._positions[supplier_id]
+                    if haversine_km(latitude, longitude, supplier_lat, supplier_lon) <= radius_km:
+                        candidates.add(supplier_id)
+        return candidates
+
+    def _discard(self, supplier_id: int):
+        self._unlocated.discard(supplier_id)
+        position = self._positions.pop(supplier_id, None)
+        if position:
+            cell = grid_cell(position[0], position[1], self.cell_size_deg)
+            members = self._cells.get(cell)
+            if members is not None:
+                members.discard(supplier_id)
+                if not members:
+                    del self._cells[cell]
+
+supplier_geo_index = SupplierGeoIndex(
+    cell_size_deg=settings.geo_index_cell_size_deg,
+    refresh_seconds=settings.geo_index_refresh_seconds
+)
+
+def supplier_bounding_box_filter(latitude: float, longitude: float, radius_km: float):
+    """SQL condition keeping suppliers whose coordinates fall inside the search box.
+
+    Suppliers without coordinates pass, matching the default-distance rule.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    in_box = Supplier.latitude.between(min_lat, max_lat)
+    if min_lon is not None:
+        in_box = and_(in_box, Supplier.longitude.between(min_lon, max_lon))
+
+    return or_(
+        Supplier.latitude.is_(None),
+        Supplier.longitude.is_(None),
+        Supplier.latitude == 0,
+        Supplier.longitude == 0,
+        in_box
+    )
+
+def apply_proximity_filter(query, latitude: Optional[float], longitude: Optional[float],
+                           radius_km: float, db: Session):
+    """Limit a Product/Supplier query to suppliers that can be within radius_km"""
+    if not has_coordinates(latitude, longitude):
+        return query  # Every supplier falls back to the default distance
+
+    supplier_geo_index.ensure_loaded(db)
+    supplier_ids = supplier_geo_index.candidates_within(latitude, longitude, radius_km)
+    return query.filter(
+        supplier_bounding_box_filter(latitude, longitude, radius_km),
+        Supplier.id.in_(supplier_ids)
+    )
@@ -0,0 +1,117 @@
+
+import asyncio
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Hashable, List, Sequence, Tuple
+import numpy as np
+from langchain.schema import Document
+
+from .requirement_parser import PRODUCTS
+
+_TOKEN = re.compile(r"[\w\u0900-\u097F]+")
+
+STOP_WORDS = {
+    "a", "an", "the", "and", "or", "of", "for", "to", "in", "on", "at", "by", "with", "is", "are", "be",
+    "it", "its", "as", "this", "that", "than", "should", "can", "i", "we", "my", "me", "need", "want",
+    "please", "english", "hindi", "none", "kg", "kilo", "gram", "grams", "litre", "liter", "dozen",
+    "piece", "pieces", "chahiye", "चाहिए", "mujhe", "मुझे", "hai", "है", "ka", "ki", "ke", "का", "की",
+    "के", "ko", "को", "se", "से", "mein", "में", "aur", "और", "kya", "क्या", "kaise", "कैसे",
+}
+
+# Hindi and Hinglish product names fold to the English catalog name
+_ALIASES: Dict[str, List[str]] = {key[0]: name.split() for key, name in PRODUCTS.items() if len(key) == 1}
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase index terms; numbers, stop words and units are dropped, product aliases folded"""
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in STOP_WORDS or token.isdigit() or len(token) < 2:
+            continue
+        terms.extend(_ALIASES.get(token, [token]))
+    return terms
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = 60) -> List[Tuple[Hashable, float]]:
+    """Fuse ranked lists by summing 1 / (k + rank); best first"""
+    scores: Dict[Hashable, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring"""
+
+    def __init__(self, texts: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+        for doc_id, text in enumerate(texts):
+            terms = Counter(tokenize(text))
+            self.doc_lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((doc_id, tf))
+
+        n = len(self.doc_lengths)
+        self.avg_length = (sum(self.doc_lengths) / n) if n else 0.0
+        self.idf = {term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                    for term, docs in self.postings.items()}
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Top k (doc_id, score) pairs; only documents sharing a term with the query"""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+class HybridRetriever:
+    """Keyword and vector retrieval over a FAISS store, fused with reciprocal-rank fusion.
+
+    BM25 catches exact product and Hindi terms that embed poorly; the
+    vector index catches paraphrases. Each side contributes its top
+    `candidates` chunks and RRF picks the final k, so neither score scale
+    needs calibrating against the other.
+    """
+
+    def __init__(self, vector_store, candidates: int = 20, rrf_k: int = 60):
+        self.vector_store = vector_store
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        # Chunk positions match FAISS row ids
+        self.documents: List[Document] = [
+            vector_store.docstore.search(vector_store.index_to_docstore_id[i])
+            for i in range(vector_store.index.ntotal)
+        ]
+        self.bm25 = BM25Index([doc.page_content for doc in self.documents])
+
+    def search(self, query: str, k: int = 3) -> List[Document]:
+        if not query.strip():
+            return []
+        vector_ids = self._vector_ids(self.vector_store.embeddings.embed_query(query))
+        return self._fuse(query, vector_ids, k)
+
+    async def asearch(self, query: str, k: int = 3) -> List[Document]:
+        if not query.strip():
+            return []
+        embedding = await self.vector_store.embeddings.aembed_query(query)
+        vector_ids = await asyncio.to_thread(self._vector_ids, embedding)
+        return self._fuse(query, vector_ids, k)
+
+    def _vector_ids(self, embedding: List[float]) -> List[int]:
+        n = min(self.candidates, self.vector_store.index.ntotal)
+        if n == 0:
+            return []
+        _, ids = self.vector_store.index.search(np.asarray([embedding], dtype=np.float32), n)
+        return [int(i) for i in ids[0] if i >= 0]
+
+    def _fuse(self, query: str, vector_ids: List[int], k: int) -> List[Document]:
+        keyword_ids = [doc_id for doc_id, _ in self.bm25.search(query, self.candidates)]
+        fused = reciprocal_rank_fusion([vector_ids, keyword_ids], k=self.rrf_k)
+        return [self.documents[doc_id] for doc_id, _ in fused[:k]]
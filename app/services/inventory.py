@@ -0,0 +1,220 @@
+
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models.order import Order, OrderItem
+from ..models.product import Product
+from ..schemas.order import CartCheckout, OrderCreate
+from .catalog import product_catalog
+
+class ReservationError(Exception):
+    """A product could not be reserved; status_code and detail describe why"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+def reserve_stock(db: Session, product_id: int, quantity: float) -> Tuple[int, float, float]:
+    """Take quantity from a product's stock in the current transaction.
+
+    The availability check and the decrement are one conditional UPDATE, so
+    concurrent orders can never take more than is in stock. Returns
+    (supplier_id, price_per_unit, remaining quantity); does not commit.
+    """
+    if db.get_bind().dialect.update_returning:
+        row = db.execute(
+            update(Product)
+            .where(
+                Product.id == product_id,
+                Product.is_available == True,
+                Product.available_quantity >= quantity
+            )
+            .values(available_quantity=Product.available_quantity - quantity)
+            .returning(Product.supplier_id, Product.price_per_unit, Product.available_quantity),
+            execution_options={"synchronize_session": False}
+        ).first()
+    else:
+        # No UPDATE ... RETURNING: lock the row, then check and decrement
+        product = db.execute(
+            select(Product).where(Product.id == product_id).with_for_update()
+        ).scalars().first()
+        row = None
+        if product and product.is_available and product.available_quantity >= quantity:
+            product.available_quantity -= quantity
+            db.flush()
+            row = (product.supplier_id, product.price_per_unit, product.available_quantity)
+
+    if row is None:
+        raise _reservation_failure(db, product_id)
+    return tuple(row)
+
+def create_reserved_order(db: Session, vendor_id: int, payload: OrderCreate) -> Order:
+    """Reserve stock and insert the order in a single transaction"""
+    try:
+        supplier_id, unit_price, remaining = reserve_stock(db, payload.product_id, payload.quantity)
+        order = Order(
+            **payload.dict(),
+            vendor_id=vendor_id,
+            supplier_id=supplier_id,
+            unit_price=unit_price,
+            total_amount=unit_price * payload.quantity,
+            status="pending"
+        )
+        db.add(order)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    product_catalog.set_available_quantity(payload.product_id, remaining)
+    return order
+
+def reserve_stock_bulk(db: Session, quantities: Dict[int, float]) -> Dict[int, Tuple[int, float, float]]:
+    """Take stock for several products with one statement, all or nothing.
+
+    quantities maps product id to units. Returns product id ->
+    (supplier_id, price_per_unit, remaining quantity); does not commit.
+    Raises ReservationError if any product cannot be reserved, after which
+    the caller must roll back.
+    """
+    wanted = case(quantities, value=Product.id)
+    conditions = [
+        Product.id.in_(list(quantities)),
+        Product.is_available == True,
+        Product.available_quantity >= wanted
+    ]
+    if db.get_bind().dialect.update_returning:
+        if len(quantities) > 1:
+            # The UPDATE locks rows in scan order, so two carts sharing products
+            # could each hold one and wait on the other; lock them in id order first
+            db.execute(
+                select(Product.id).where(Product.id.in_(list(quantities))).order_by(Product.id).with_for_update()
+            )
+        rows = db.execute(
+            update(Product)
+            .where(*conditions)
+            .values(available_quantity=Product.available_quantity - wanted)
+            .returning(Product.id, Product.supplier_id, Product.price_per_unit, Product.available_quantity),
+            execution_options={"synchronize_session": False}
+        ).all()
+        reserved = {row[0]: tuple(row[1:]) for row in rows}
+    else:
+        # No UPDATE ... RETURNING: lock the rows that qualify, then decrement them together
+        rows = db.execute(
+            select(Product.id, Product.supplier_id, Product.price_per_unit, Product.available_quantity)
+            .where(*conditions)
+            .order_by(Product.id)
+            .with_for_update()
+        ).all()
+        reserved = {row[0]: (row[1], row[2], row[3] - quantities[row[0]]) for row in rows}
+        if len(reserved) == len(quantities):
+            db.execute(
+                update(Product)
+                .where(Product.id.in_(list(reserved)))
+                .values(available_quantity=Product.available_quantity - wanted),
+                execution_options={"synchronize_session": False}
+            )
+
+    if len(reserved) < len(quantities):
+        raise _bulk_reservation_failure(db, [pid for pid in quantities if pid not in reserved])
+    return reserved
+
+def create_cart_orders(db: Session, vendor_id: int, payload: CartCheckout) -> List[Order]:
+    """Reserve every cart item and write one Order per supplier with its OrderItems.
+
+    Everything commits in one transaction with a fixed number of statements
+    (a row lock, one stock UPDATE and two bulk INSERTs) however many items
+    the cart holds. The order's items are authoritative; its product_id,
+    quantity and unit_price are placeholders for the NOT NULL columns single
+    orders use (first item, summed units, average price) and mean nothing
+    when the items are in different units.
+    """
+    quantities: Dict[int, float] = defaultdict(float)
+    for item in payload.items:
+        quantities[item.product_id] += item.quantity
+
+    try:
+        reserved = reserve_stock_bulk(db, dict(quantities))
+
+        # Group by supplier, keeping the cart's item order
+        by_supplier: Dict[int, List[int]] = defaultdict(list)
+        for product_id in quantities:
+            by_supplier[reserved[product_id][0]].append(product_id)
+
+        order_rows = []
+        for supplier_id, product_ids in by_supplier.items():
+            total_quantity = sum(quantities[pid] for pid in product_ids)
+            total_amount = sum(reserved[pid][1] * quantities[pid] for pid in product_ids)
+            # product_id, quantity and unit_price are placeholders, see the docstring
+            order_rows.append({
+                "vendor_id": vendor_id,
+                "supplier_id": supplier_id,
+                "product_id": product_ids[0],
+                "quantity": total_quantity,
+                "unit_price": total_amount / total_quantity,
+                "total_amount": total_amount,
+                "status": "pending",
+                "requirements": payload.requirements,
+                "delivery_address": payload.delivery_address,
+                "delivery_date": payload.delivery_date
+            })
+        # Batched INSERT ... RETURNING; rows come back in any order, but each
+        # order has its own supplier and each item its own (order, product)
+        returned = db.scalars(insert(Order).returning(Order), order_rows).all()
+        order_by_supplier = {order.supplier_id: order for order in returned}
+        orders = [order_by_supplier[supplier_id] for supplier_id in by_supplier]
+
+        item_rows = []
+        for order, product_ids in zip(orders, by_supplier.values()):
+            for pid in product_ids:
+                item_rows.append({
+                    "order_id": order.id,
+                    "product_id": pid,
+                    "quantity": quantities[pid],
+                    "unit_price": reserved[pid][1],
+                    "subtotal": reserved[pid][1] * quantities[pid]
+                })
+        items = db.scalars(insert(OrderItem).returning(OrderItem), item_rows).all()
+        # Detached rows keep the values RETURNING gave them instead of being reloaded one by one
+        for row in [*orders, *items]:
+            db.expunge(row)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    for product_id, (_, _, remaining) in reserved.items():
+        product_catalog.set_available_quantity(product_id, remaining)
+
+    item_by_key = {(item.order_id, item.product_id): item for item in items}
+    for order, product_ids in zip(orders, by_supplier.values()):
+        # Read by CartOrderResponse; order_items is a dynamic relationship
+        order.items = [item_by_key[(order.id, pid)] for pid in product_ids]
+    return orders
+
+def _reservation_failure(db: Session, product_id: int) -> ReservationError:
+    """Why a conditional reservation matched no row"""
+    is_available = db.execute(
+        select(Product.is_available).where(Product.id == product_id)
+    ).first()
+    if is_available is None:
+        return ReservationError(404, "Product not found")
+    if not is_available[0]:
+        return ReservationError(400, "Product is not available")
+    return ReservationError(400, "Insufficient product quantity")
+
+def _bulk_reservation_failure(db: Session, product_ids: List[int]) -> ReservationError:
+    """Which cart products could not be reserved, and why"""
+    found = dict(db.execute(
+        select(Product.id, Product.is_available).where(Product.id.in_(product_ids))
+    ).all())
+    missing = [pid for pid in product_ids if pid not in found]
+    if missing:
+        return ReservationError(404, f"Products not found: {', '.join(map(str, missing))}")
+    unavailable = [pid for pid in product_ids if not found[pid]]
+    if unavailable:
+        return ReservationError(400, f"Products not available: {', '.join(map(str, unavailable))}")
+    return ReservationError(400, f"Insufficient quantity for products: {', '.join(map(str, product_ids))}")
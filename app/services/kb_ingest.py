@@ -0,0 +1,340 @@
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+import faiss
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+from ..config.settings import settings
+from .knowledge_base import DEFAULT_KNOWLEDGE_TEXTS
+
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+FILE_EXTENSIONS = (".txt", ".md", ".jsonl")
+
+# IVF needs this many training points per list for stable centroids
+IVF_POINTS_PER_LIST = 39
+
+class KnowledgeSource:
+    """One unit of ingestion: an inline text or a file.
+
+    The fingerprint changes whenever the content does; files use size and
+    mtime so unchanged corpora are checked without being read.
+    """
+
+    def __init__(self, source_id: str, fingerprint: str, path: Optional[str] = None, text: Optional[str] = None):
+        self.source_id = source_id
+        self.fingerprint = fingerprint
+        self.path = path
+        self.text = text
+
+    def documents(self) -> Iterator[Document]:
+        if self.text is not None:
+            yield Document(page_content=self.text, metadata={"source": self.source_id})
+            return
+
+        if self.path.endswith(".jsonl"):
+            # One document per line: {"text": ..., "metadata": {...}}
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        metadata = {**record.get("metadata", {}), "source": self.source_id}
+                        yield Document(page_content=record["text"], metadata=metadata)
+        else:
+            with open(self.path, encoding="utf-8") as f:
+                yield Document(page_content=f.read(), metadata={"source": self.source_id})
+
+def text_sources(texts: List[str]) -> List[KnowledgeSource]:
+    """Sources for inline knowledge texts"""
+    sources = []
+    for text in texts:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        sources.append(KnowledgeSource(f"text:{digest[:16]}", digest, text=text))
+    return sources
+
+def file_sources(paths: Iterable[str]) -> Iterator[KnowledgeSource]:
+    """Sources for files, walking directories in a stable order"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(FILE_EXTENSIONS):
+                        yield _file_source(os.path.join(root, name))
+        elif os.path.exists(path):
+            yield _file_source(path)
+        else:
+            print(f"Knowledge source not found: {path}")
+
+def _file_source(path: str) -> KnowledgeSource:
+    stat = os.stat(path)
+    return KnowledgeSource(f"file:{os.path.abspath(path)}", f"{stat.st_size}:{stat.st_mtime_ns}", path=path)
+
+def create_index(index_type: str,
+                 dimension: int,
+                 training_vectors: Optional[np.ndarray] = None,
+                 ivf_nlist: int = 256,
+                 hnsw_m: int = 32):
+    """Empty FAISS index of the given type; IVF is trained on training_vectors"""
+    if index_type == "hnsw":
+        return faiss.IndexHNSWFlat(dimension, hnsw_m)
+    if index_type == "ivf":
+        # Small corpora get fewer lists so every list has enough training points
+        nlist = max(1, min(ivf_nlist, len(training_vectors) // IVF_POINTS_PER_LIST))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dimension), dimension, nlist)
+        index.train(training_vectors)
+        return index
+    return faiss.IndexFlatL2(dimension)
+
+class KnowledgeIngestor:
+    """Streams knowledge sources into a persisted FAISS index.
+
+    Sources are chunked with RecursiveCharacterTextSplitter and embedded in
+    batches of batch_size, which bounds each embedding request. The chunks
+    (docstore) and the vectors (index, plus IVF's training buffer) are still
+    held in memory in full, so memory grows with corpus size. A manifest
+    records each source's fingerprint: new sources are appended to the
+    existing index, while changed or removed sources (or different
+    embedding/chunking/index settings) trigger a rebuild. The index can be
+    flat (exact), IVF or HNSW (approximate, sub-millisecond on large
+    corpora). A file lock keeps concurrent workers from writing at once.
+    """
+
+    def __init__(self,
+                 embeddings,
+                 embedding_model: str,
+                 index_dir: str,
+                 index_type: str = "flat",
+                 chunk_size: int = 200,
+                 chunk_overlap: int = 20,
+                 batch_size: int = 64,
+                 ivf_nlist: int = 256,
+                 ivf_nprobe: int = 8,
+                 hnsw_m: int = 32,
+                 hnsw_ef_search: int = 64):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES}")
+        self.embeddings = embeddings
+        self.embedding_model = embedding_model
+        self.index_type = index_type
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.batch_size = batch_size
+        self.ivf_nlist = ivf_nlist
+        self.ivf_nprobe = ivf_nprobe
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_search = hnsw_ef_search
+        self.store_dir = os.path.join(index_dir, "knowledge")
+        self.index_path = os.path.join(self.store_dir, "index.faiss")
+        self.docs_path = os.path.join(self.store_dir, "docs.jsonl")
+        self.manifest_path = os.path.join(self.store_dir, "manifest.json")
+        self.splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    @property
+    def params(self) -> Dict[str, object]:
+        """Settings that make a persisted index incompatible when changed"""
+        params = {
+            "embedding_model": self.embedding_model,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "index_type": self.index_type
+        }
+        if self.index_type == "ivf":
+            params["ivf_nlist"] = self.ivf_nlist
+        if self.index_type == "hnsw":
+            params["hnsw_m"] = self.hnsw_m
+        return params
+
+    def sync(self, sources: Iterable[KnowledgeSource]) -> FAISS:
+        """Bring the persisted index up to date with sources and return it as a vector store"""
+        sources = list(sources)
+        with self._lock():
+            manifest = self._read_manifest()
+            known = manifest["sources"] if manifest else {}
+            current = {source.source_id for source in sources}
+
+            changed = [s for s in sources if s.source_id in known and known[s.source_id] != s.fingerprint]
+            removed = set(known) - current
+            new = [s for s in sources if s.source_id not in known]
+
+            if manifest is None or changed or removed:
+                if manifest is not None:
+                    print(f"Rebuilding knowledge base: {len(changed)} changed, {len(removed)} removed sources")
+                index, documents = self._build(sources)
+                self._save(index, documents, sources)
+            elif new:
+                index, documents = self._read_store()
+                index, documents = self._append(index, documents, new)
+                self._save(index, documents, sources)
+                print(f"Appended {len(new)} sources to knowledge base")
+            else:
+                index, documents = self._read_store(mmap=True)
+
+        self._tune(index)
+        print(f"Knowledge base ready: {index.ntotal} chunks, {self.index_type} index")
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=InMemoryDocstore({str(i): doc for i, doc in enumerate(documents)}),
+            index_to_docstore_id={i: str(i) for i in range(len(documents))}
+        )
+
+    def _build(self, sources: List[KnowledgeSource]) -> Tuple[object, List[Document]]:
+        return self._append(None, [], sources)
+
+    def _append(self, index, documents: List[Document], sources: List[KnowledgeSource]) -> Tuple[object, List[Document]]:
+        pending: List[Tuple[np.ndarray, List[Document]]] = []
+        for vectors, batch in self._embedded_batches(sources):
+            if index is None and self.index_type == "ivf":
+                # Buffer enough vectors to train the coarse quantizer before adding any
+                pending.append((vectors, batch))
+                if sum(len(v) for v, _ in pending) < self.ivf_nlist * IVF_POINTS_PER_LIST:
+                    continue
+                vectors, batch = self._merge(pending)
+                pending = []
+                index = self._create(vectors)
+            elif index is None:
+                index = self._create(vectors)
+            index.add(vectors)
+            documents.extend(batch)
+
+        if pending:
+            vectors, batch = self._merge(pending)
+            index = self._create(vectors)
+            index.add(vectors)
+            documents.extend(batch)
+        if index is None:
+            # Empty corpus; an untrained IVF index cannot be saved, so start flat
+            dimension = len(self.embeddings.embed_query("dimension probe"))
+            index = create_index("flat" if self.index_type == "ivf" else self.index_type, dimension,
+                                 hnsw_m=self.hnsw_m)
+        return index, documents
+
+    def _create(self, vectors: np.ndarray):
+        return create_index(self.index_type, vectors.shape[1], training_vectors=vectors,
+                            ivf_nlist=self.ivf_nlist, hnsw_m=self.hnsw_m)
+
+    @staticmethod
+    def _merge(pending: List[Tuple[np.ndarray, List[Document]]]) -> Tuple[np.ndarray, List[Document]]:
+        return np.vstack([v for v, _ in pending]), [doc for _, batch in pending for doc in batch]
+
+    def _embedded_batches(self, sources: List[KnowledgeSource]) -> Iterator[Tuple[np.ndarray, List[Document]]]:
+        batch: List[Document] = []
+        for source in sources:
+            for document in source.documents():
+                for chunk in self.splitter.split_documents([document]):
+                    batch.append(chunk)
+                    if len(batch) == self.batch_size:
+                        yield self._embed(batch), batch
+                        batch = []
+        if batch:
+            yield self._embed(batch), batch
+
+    def _embed(self, batch: List[Document]) -> np.ndarray:
+        vectors = self.embeddings.embed_documents([doc.page_content for doc in batch])
+        return np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+
+    def _tune(self, index):
+        if self.index_type == "ivf" and isinstance(index, faiss.IndexIVF):
+            index.nprobe = min(self.ivf_nprobe, index.nlist)
+        elif self.index_type == "hnsw" and isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = self.hnsw_ef_search
+
+    def _read_manifest(self) -> Optional[Dict]:
+        if not all(os.path.exists(p) for p in (self.manifest_path, self.index_path, self.docs_path)):
+            return None
+        with open(self.manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get("params") != self.params:
+            print("Knowledge base settings changed, rebuilding")
+            return None
+        return manifest
+
+    def _read_store(self, mmap: bool = False) -> Tuple[object, List[Document]]:
+        index = None
+        if mmap:
+            try:
+                # Map the vectors instead of reading them into every worker's heap
+                index = faiss.read_index(self.index_path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+            except Exception:
+                index = None
+        if index is None:
+            index = faiss.read_index(self.index_path)
+
+        documents = []
+        with open(self.docs_path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                documents.append(Document(page_content=record["page_content"], metadata=record.get("metadata", {})))
+        return index, documents
+
+    def _save(self, index, documents: List[Document], sources: List[KnowledgeSource]):
+        os.makedirs(self.store_dir, exist_ok=True)
+        # Write to temp files and rename so concurrent readers never see a partial store
+        faiss.write_index(index, self.index_path + ".tmp")
+        with open(self.docs_path + ".tmp", "w", encoding="utf-8") as f:
+            for doc in documents:
+                f.write(json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False))
+                f.write("\n")
+        with open(self.manifest_path + ".tmp", "w") as f:
+            json.dump({
+                "params": self.params,
+                "sources": {source.source_id: source.fingerprint for source in sources}
+            }, f)
+        os.replace(self.index_path + ".tmp", self.index_path)
+        os.replace(self.docs_path + ".tmp", self.docs_path)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
+
+    @contextmanager
+    def _lock(self):
+        os.makedirs(self.store_dir, exist_ok=True)
+        with open(os.path.join(self.store_dir, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def configured_sources(paths: Optional[List[str]] = None) -> List[KnowledgeSource]:
+    """Built-in knowledge texts plus the configured files and directories"""
+    paths = settings.kb_source_paths if paths is None else paths
+    return text_sources(DEFAULT_KNOWLEDGE_TEXTS) + list(file_sources(paths))
+
+def knowledge_ingestor(embeddings, index_type: Optional[str] = None) -> KnowledgeIngestor:
+    """Ingestor configured from settings"""
+    return KnowledgeIngestor(
+        embeddings,
+        embedding_model=settings.embedding_model,
+        index_dir=settings.index_dir,
+        index_type=index_type or settings.kb_index_type,
+        chunk_size=200,
+        chunk_overlap=20,
+        batch_size=settings.kb_embed_batch_size,
+        ivf_nlist=settings.kb_ivf_nlist,
+        ivf_nprobe=settings.kb_ivf_nprobe,
+        hnsw_m=settings.kb_hnsw_m,
+        hnsw_ef_search=settings.kb_hnsw_ef_search
+    )
+
+def main():
+    """Ingest the knowledge sources ahead of a deploy, so workers start from a built index"""
+    from .embedding_cache import get_embeddings
+
+    parser = argparse.ArgumentParser(description="Build or update the knowledge-base index")
+    parser.add_argument("paths", nargs="*", help="Files or directories (default: KB_SOURCE_PATHS)")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, help="Default: KB_INDEX_TYPE")
+    args = parser.parse_args()
+
+    ingestor = knowledge_ingestor(get_embeddings(), index_type=args.index_type)
+    ingestor.sync(configured_sources(args.paths or None))
+
+if __name__ == "__main__":
+    main()
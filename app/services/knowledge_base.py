@@ -0,0 +1,99 @@
+
+import threading
+import time
+from typing import Callable, List, Optional
+from langchain_community.vectorstores import FAISS
+
+from .hybrid_retriever import HybridRetriever
+
+DEFAULT_KNOWLEDGE_TEXTS = [
+    "Fresh vegetables like onions, tomatoes, potatoes are essential for street food vendors",
+    "Quality indicators: Fresh vegetables should be firm, no dark spots, good color",
+    "Pricing factors: Season, quality, quantity, location affect vegetable prices",
+    "Storage tips: Keep vegetables in cool, dry place to maintain freshness",
+    "Bulk buying advantages: Better prices for larger quantities, reduced frequent trips",
+    "Local suppliers often provide fresher products and better prices",
+    "Video verification helps ensure product quality before purchase",
+    "Trust scores help vendors choose reliable suppliers",
+    "Minimum order quantities vary by supplier and product type",
+    "Delivery options depend on distance and order value",
+    "Seasonal variations affect prices - onions cheaper in winter, tomatoes in summer",
+    "Quality grades: Premium (A), Good (B), Basic (C) with different pricing",
+    "Payment terms: Cash on delivery, advance payment for bulk orders",
+    "Fresh produce should be consumed within 2-3 days for best quality",
+    "Wholesale markets offer better prices but require larger quantities",
+]
+
+class KnowledgeBase:
+    """RAG vector store that is built once per corpus and reused across restarts.
+
+    Sources are synced into a persisted index by a KnowledgeIngestor, which
+    only embeds sources that are new or changed since the last run. Loading
+    happens in a background thread so construction returns immediately.
+    With hybrid=True a BM25 index is built over the same chunks for
+    HybridRetriever. After a failed build, callers get None without waiting
+    and the build is retried once retry_seconds have passed.
+    """
+
+    def __init__(self,
+                 sources: Callable[[], List],
+                 ingestor,
+                 hybrid: bool = True,
+                 candidates: int = 20,
+                 rrf_k: int = 60,
+                 retry_seconds: float = 60.0):
+        self.sources = sources
+        self.ingestor = ingestor
+        self.hybrid = hybrid
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.retry_seconds = retry_seconds
+        self._vector_store: Optional[FAISS] = None
+        self._retriever: Optional[HybridRetriever] = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._loader: Optional[threading.Thread] = None
+        self._failed_at: Optional[float] = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self):
+        """Load or build the vector store in a background thread"""
+        with self._lock:
+            if self._loader is None:
+                self._loader = threading.Thread(target=self._load_or_build, daemon=True)
+                self._loader.start()
+
+    def get_vector_store(self, timeout: Optional[float] = None) -> Optional[FAISS]:
+        """Wait up to timeout seconds for the vector store; None if it is not ready yet"""
+        if self._failed_at is not None:
+            # The last build failed: don't make every request wait out the outage
+            if time.monotonic() - self._failed_at >= self.retry_seconds:
+                self.start()
+            return self._vector_store
+        self.start()
+        loader = self._loader
+        if loader is not None and not self.is_ready:
+            loader.join(timeout)  # Returns early if the build fails
+        return self._vector_store
+
+    def get_retriever(self, timeout: Optional[float] = None) -> Optional[HybridRetriever]:
+        """Wait up to timeout seconds for the hybrid retriever; None if not ready or disabled"""
+        self.get_vector_store(timeout)
+        return self._retriever
+
+    def _load_or_build(self):
+        try:
+            vector_store = self.ingestor.sync(self.sources())
+            if self.hybrid:
+                self._retriever = HybridRetriever(vector_store, candidates=self.candidates, rrf_k=self.rrf_k)
+            self._vector_store = vector_store
+            self._failed_at = None
+            self._ready.set()
+        except Exception as e:
+            print(f"Knowledge base unavailable: {e}")
+            with self._lock:
+                self._failed_at = time.monotonic()
+                self._loader = None  # Allow a retry after retry_seconds
@@ -0,0 +1,318 @@
+
+import asyncio
+import bisect
+import json
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional
+from google.api_core.exceptions import DeadlineExceeded
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from ..config.settings import settings
+from .requirement_parser import requirement_parser
+
+class LLMUnavailableError(Exception):
+    """Raised when a call is rejected by the circuit breaker or the concurrency limit"""
+
+# What the model clients raise when their own timeout expires
+TIMEOUT_ERRORS = (TimeoutError, asyncio.TimeoutError, DeadlineExceeded)
+
+def is_timeout(error: Optional[BaseException]) -> bool:
+    """Whether an error, or one it was raised from, is a timeout"""
+    while error is not None:
+        if isinstance(error, TIMEOUT_ERRORS):
+            return True
+        error = error.__cause__
+    return False
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed buckets, in seconds"""
+
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 60.0)
+
+    def __init__(self):
+        self._counts = [0] * (len(self.BUCKETS) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+            self._sum += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile"""
+        total = sum(self._counts)
+        if total == 0:
+            return None
+        running = 0
+        for i, count in enumerate(self._counts):
+            running += count
+            if running >= q * total:
+                return self.BUCKETS[i] if i < len(self.BUCKETS) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            total_seconds = self._sum
+        labels = [f"le_{bound}" for bound in self.BUCKETS] + ["le_inf"]
+        total = sum(counts)
+        return {
+            "count": total,
+            "mean_seconds": round(total_seconds / total, 4) if total else None,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "buckets": dict(zip(labels, counts))
+        }
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one trial call through after a cool-down"""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"  # closed, open, half_open
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            # Also retry if a half-open trial never reported back
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = "half_open"
+                self._opened_at = time.monotonic()
+                return True
+            return False  # Open, or a half-open trial is already in flight
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = "closed"
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+class LocalChatModel:
+    """Deterministic offline stand-in for the chat model, for load tests.
+
+    Extraction prompts are answered with the rule-based parser,
+    single-pass prompts with fixed reply templates, and everything else
+    with a short canned reply. latency_seconds simulates network time.
+    Like the Gemini client, invoke() gives up with TimeoutError after
+    timeout_seconds; the async methods are bounded by LLMProvider.
+    """
+
+    EXTRACTION_PREFIX = "Extract requirements from: "
+
+    def __init__(self, latency_seconds: float = 0.0, timeout_seconds: Optional[float] = None):
+        self.latency_seconds = latency_seconds
+        self.timeout_seconds = timeout_seconds
+
+    def invoke(self, messages: List[Any]) -> AIMessage:
+        if self.timeout_seconds is not None and self.latency_seconds > self.timeout_seconds:
+            time.sleep(self.timeout_seconds)
+            raise TimeoutError(f"Local model did not answer within {self.timeout_seconds}s")
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return AIMessage(content=self._respond(messages))
+
+    async def ainvoke(self, messages: List[Any]) -> AIMessage:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return AIMessage(content=self._respond(messages))
+
+    async def astream(self, messages: List[Any]) -> AsyncIterator[AIMessageChunk]:
+        words = self._respond(messages).split(" ")
+        for i, word in enumerate(words):
+            if self.latency_seconds:
+                await asyncio.sleep(self.latency_seconds / len(words))
+            yield AIMessageChunk(content=word if i == 0 else " " + word)
+
+    def _respond(self, messages: List[Any]) -> str:
+        system = messages[0].content if messages else ""
+        human = messages[-1].content if messages else ""
+        if human.startswith(self.EXTRACTION_PREFIX):
+            return json.dumps(requirement_parser.parse(human[len(self.EXTRACTION_PREFIX):]).dict())
+        if '"reply_found"' in system:
+            return json.dumps({
+                "requirements": requirement_parser.parse(human).dict(),
+                "reply_found": "Found {count} suppliers. Best: {best_supplier} at ₹{best_price}/{unit}.",
+                "reply_none": "No suppliers found for {product_name}."
+            })
+        return "Here are the suppliers I found for you. Compare prices and ratings before ordering."
+
+class LLMProvider:
+    """Chat model wrapper with a concurrency limit, timeouts, a circuit breaker and latency metrics.
+
+    Calls wait at most timeout_seconds for a free slot and then at most
+    timeout_seconds for the model. Failures and timeouts trip the breaker;
+    while it is open, calls fail fast with LLMUnavailableError so callers
+    can fall back to the deterministic extractor and templates.
+    """
+
+    def __init__(self,
+                 model,
+                 backend: str,
+                 max_concurrency: int = 32,
+                 timeout_seconds: float = 20.0,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.model = model
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._async_semaphores = weakref.WeakKeyDictionary()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "failures": 0, "timeouts": 0, "rejected": 0}
+        self.latency = {"invoke": LatencyHistogram(), "stream_first_token": LatencyHistogram(),
+                        "stream_total": LatencyHistogram()}
+
+    def invoke(self, messages: List[Any]) -> Any:
+        self._admit()
+        if not self._semaphore.acquire(timeout=self.timeout_seconds):
+            self._reject("concurrency limit reached")
+        started = time.perf_counter()
+        try:
+            self._track(1)
+            # The sync clients enforce timeout_seconds themselves (see build_llm_provider)
+            response = self.model.invoke(messages)
+        except Exception as e:
+            self._failed(started, timed_out=is_timeout(e))
+            raise
+        finally:
+            self._track(-1)
+            self._semaphore.release()
+        self._succeeded("invoke", started)
+        return response
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        self._admit()
+        semaphore = self._async_semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self._reject("concurrency limit reached")
+        started = time.perf_counter()
+        try:
+            self._track(1)
+            response = await asyncio.wait_for(self.model.ainvoke(messages), self.timeout_seconds)
+        except Exception as e:
+            self._failed(started, timed_out=is_timeout(e))
+            raise
+        finally:
+            self._track(-1)
+            semaphore.release()
+        self._succeeded("invoke", started)
+        return response
+
+    async def astream(self, messages: List[Any]) -> AsyncIterator[Any]:
+        """Stream chunks; the timeout applies to the wait for each chunk"""
+        self._admit()
+        semaphore = self._async_semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self._reject("concurrency limit reached")
+        started = time.perf_counter()
+        first = True
+        try:
+            self._track(1)
+            stream = self.model.astream(messages).__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), self.timeout_seconds)
+                except StopAsyncIteration:
+                    break
+                if first:
+                    self.latency["stream_first_token"].observe(time.perf_counter() - started)
+                    first = False
+                yield chunk
+        except Exception as e:
+            self._failed(started, timed_out=is_timeout(e))
+            raise
+        finally:
+            self._track(-1)
+            semaphore.release()
+        self._succeeded("stream_total", started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "breaker_state": self.breaker.state,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            **self._counters,
+            "latency": {name: histogram.snapshot() for name, histogram in self.latency.items()}
+        }
+
+    def _admit(self):
+        if not self.breaker.allow():
+            self._reject("circuit breaker open")
+
+    def _reject(self, reason: str):
+        with self._lock:
+            self._counters["rejected"] += 1
+        raise LLMUnavailableError(reason)
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives belong to one event loop
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._async_semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._async_semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    def _track(self, delta: int):
+        with self._lock:
+            self._in_flight += delta
+
+    def _succeeded(self, histogram: str, started: float):
+        self.latency[histogram].observe(time.perf_counter() - started)
+        self.breaker.record_success()
+        with self._lock:
+            self._counters["calls"] += 1
+
+    def _failed(self, started: float, timed_out: bool = False):
+        self.breaker.record_failure()
+        with self._lock:
+            self._counters["calls"] += 1
+            self._counters["failures"] += 1
+            if timed_out:
+                self._counters["timeouts"] += 1
+
+def build_llm_provider() -> LLMProvider:
+    """LLM provider for the configured backend"""
+    if settings.llm_backend == "local":
+        model = LocalChatModel(
+            latency_seconds=settings.local_llm_latency_ms / 1000,
+            timeout_seconds=settings.llm_timeout_seconds
+        )
+    else:
+        model = ChatGoogleGenerativeAI(
+            model=settings.llm_model,
+            google_api_key=settings.google_api_key,
+            temperature=0.3,
+            timeout=settings.llm_timeout_seconds
+        )
+    return LLMProvider(
+        model,
+        backend=settings.llm_backend,
+        max_concurrency=settings.llm_max_concurrency,
+        timeout_seconds=settings.llm_timeout_seconds,
+        breaker=CircuitBreaker(settings.llm_breaker_failure_threshold, settings.llm_breaker_reset_seconds)
+    )
+
+llm_provider = build_llm_provider()
@@ -3,10 +3,16 @@ from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 import math
+import numpy as np
 
 from ..models.product import Product
 from ..models.user import Supplier, Vendor
 from ..schemas.chat import RequirementExtraction
+from ..config.settings import settings
+from ..utils.geo_utils import has_coordinates, haversine_km_array, DEFAULT_DISTANCE_KM
+from .geo_index import apply_proximity_filter
+from .catalog import product_catalog
+from .text_search import contains
 
 class MatchingEngine:
     def __init__(self):
@@ -20,27 +26,84 @@ class MatchingEngine:
                          limit: int = 5) -> List[Dict[str, Any]]:
         """Find best matching suppliers for vendor requirements"""
         
+        if settings.catalog_snapshot_enabled:
+            return self._find_from_catalog(requirements, vendor, db, limit)
+        
         # Get base query
         query = self._build_base_query(requirements, db)
         
         # Apply filters
         query = self._apply_filters(query, requirements, vendor)
+        query = self._apply_proximity_filter(query, vendor, db)
         
         # Get results
         results = query.all()
+        if not results:
+            return []
+        
+        # Score the whole candidate set in one pass and keep the top matches
+        scores, distances = self._score_batch(results, vendor, requirements)
+        top_indices = self._top_k(scores, limit)
         
-        # Score and rank results
-        scored_results = []
-        for product, supplier in results:
-            score = self._calculate_match_score(product, supplier, vendor, requirements)
-            if score > 0:
-                result_data = self._format_result(product, supplier, vendor, requirements, score)
-                scored_results.append(result_data)
+        return [
+            self._format_result(
+                results[i][0], results[i][1], vendor, requirements,
+                float(scores[i]), distance=float(distances[i])
+            )
+            for i in top_indices
+        ]
+    
+    def _find_from_catalog(self, 
+                           requirements: RequirementExtraction, 
+                           vendor: Vendor, 
+                           db: Session,
+                           limit: int) -> List[Dict[str, Any]]:
+        """Score candidates straight from the in-process catalog snapshot"""
+        product_catalog.ensure_loaded(db)
+        view = product_catalog.query(**self._catalog_filters(requirements))
+        if not len(view):
+            return []
         
-        # Sort by score (descending)
-        scored_results.sort(key=lambda x: x['match_score'], reverse=True)
+        columns = view.columns
+        scores, distances = self._score_columns(
+            columns["price"], columns["quality"], columns["available"],
+            columns["supplier_trust"], columns["supplier_lat"], columns["supplier_lon"],
+            vendor, requirements
+        )
         
-        return scored_results[:limit]
+        results = []
+        for i in self._top_k(scores, limit):
+            product, supplier = view.row(i)
+            results.append(self._format_result(
+                product, supplier, vendor, requirements,
+                float(scores[i]), distance=float(distances[i])
+            ))
+        return results
+    
+    def _catalog_filters(self, requirements: RequirementExtraction) -> Dict[str, Any]:
+        """Catalog equivalent of the SQL filters in _apply_filters"""
+        filters = {
+            "min_available": requirements.quantity,
+            "max_minimum_order": requirements.quantity
+        }
+        
+        if requirements.product_name and requirements.product_name != "vegetables":
+            filters.update({
+                "name_terms": requirements.product_name.lower().split(),
+                "match_all_terms": False,
+                "include_category": True
+            })
+        
+        if requirements.budget and requirements.budget > 0:
+            max_total_cost = requirements.budget * (1 + self.price_tolerance)
+            filters["max_price"] = max_total_cost / requirements.quantity
+        
+        if requirements.quality_preference == "premium":
+            filters["min_quality"] = 4.0
+        elif requirements.quality_preference == "good":
+            filters["min_quality"] = 3.0
+        
+        return filters
     
     def _build_base_query(self, requirements: RequirementExtraction, db: Session):
         """Build base query for product search"""
@@ -65,8 +128,8 @@ class MatchingEngine:
             search_terms = requirements.product_name.lower().split()
             name_conditions = []
             for term in search_terms:
-                name_conditions.append(Product.name.ilike(f"%{term}%"))
-                name_conditions.append(Product.category.ilike(f"%{term}%"))
+                name_conditions.append(contains(Product.name, term))
+                name_conditions.append(contains(Product.category, term))
             
             if name_conditions:
                 query = query.filter(or_(*name_conditions))
@@ -88,6 +151,12 @@ class MatchingEngine:
         
         return query
     
+    def _apply_proximity_filter(self, query, vendor: Vendor, db: Session):
+        """Restrict the query to suppliers inside the vendor's search radius"""
+        return apply_proximity_filter(
+            query, vendor.latitude, vendor.longitude, self.max_distance_km, db
+        )
+    
     def _calculate_match_score(self, 
                               product: Product, 
                               supplier: Supplier, 
@@ -137,6 +206,93 @@ class MatchingEngine:
         
         return min(score, max_score)
     
+    def _score_batch(self, 
+                     results: List[Any], 
+                     vendor: Vendor, 
+                     requirements: RequirementExtraction):
+        """Vectorized equivalent of _calculate_match_score over all candidates.
+        
+        Returns (scores, distances); out-of-range candidates score 0.
+        """
+        count = len(results)
+        price = np.fromiter((p.price_per_unit for p, _ in results), dtype=float, count=count)
+        quality = np.fromiter((p.quality_score or 0.0 for p, _ in results), dtype=float, count=count)
+        available = np.fromiter((p.available_quantity or 0.0 for p, _ in results), dtype=float, count=count)
+        trust = np.fromiter((s.trust_score or 0.0 for _, s in results), dtype=float, count=count)
+        latitudes = np.fromiter((s.latitude or 0.0 for _, s in results), dtype=float, count=count)
+        longitudes = np.fromiter((s.longitude or 0.0 for _, s in results), dtype=float, count=count)
+        
+        return self._score_columns(
+            price, quality, available, trust, latitudes, longitudes, vendor, requirements
+        )
+    
+    def _score_columns(self, 
+                       price: np.ndarray, 
+                       quality: np.ndarray, 
+                       available: np.ndarray, 
+                       trust: np.ndarray, 
+                       latitudes: np.ndarray, 
+                       longitudes: np.ndarray, 
+                       vendor: Vendor, 
+                       requirements: RequirementExtraction):
+        """Score candidate columns with the same weights as _calculate_match_score"""
+        
+        # Distance score (30% weight)
+        distances = np.full(price.shape, DEFAULT_DISTANCE_KM)
+        if has_coordinates(vendor.latitude, vendor.longitude):
+            located = (latitudes != 0) & (longitudes != 0)
+            distances[located] = haversine_km_array(
+                vendor.latitude, vendor.longitude, latitudes[located], longitudes[located]
+            )
+        in_range = distances <= self.max_distance_km
+        score = np.maximum(0, (self.max_distance_km - distances) / self.max_distance_km * 30)
+        
+        # Price score (25% weight)
+        if requirements.budget and requirements.budget > 0:
+            total_cost = price * requirements.quantity
+            score = score + np.where(
+                total_cost <= requirements.budget,
+                np.maximum(0, (requirements.budget - total_cost) / requirements.budget * 25),
+                5
+            )
+        else:
+            score = score + 15
+        
+        # Quality (20%) and supplier trust (15%) weights
+        score = score + (quality / 5.0) * 20
+        score = score + (trust / 5.0) * 15
+        
+        # Availability score (10% weight)
+        score = score + np.where(
+            available >= requirements.quantity * 2, 10,
+            np.where(available >= requirements.quantity, 5, 0)
+        )
+        
+        score = np.minimum(score, 100.0)
+        return np.where(in_range, score, 0.0), distances
+    
+    def _top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k best positive scores, descending, ties in input order.
+        
+        Uses a partial selection instead of sorting the whole candidate set,
+        and ranks on the rounded match_score exactly like a stable sort would.
+        """
+        positive = np.flatnonzero(scores > 0)
+        if k <= 0 or positive.size == 0:
+            return positive[:0]
+        
+        rounded = np.round(scores, 1)
+        candidate_scores = rounded[positive]
+        if positive.size > k:
+            kth = np.partition(candidate_scores, positive.size - k)[positive.size - k]
+            above = positive[candidate_scores > kth]
+            ties = positive[candidate_scores == kth][:k - above.size]
+            positive = np.concatenate([above, ties])
+            candidate_scores = rounded[positive]
+        
+        order = np.lexsort((positive, -candidate_scores))
+        return positive[order]
+    
     def _calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate distance using Haversine formula"""
         if not all([lat1, lon1, lat2, lon2]):
@@ -158,13 +314,15 @@ class MatchingEngine:
                       supplier: Supplier, 
                       vendor: Vendor, 
                       requirements: RequirementExtraction,
-                      score: float) -> Dict[str, Any]:
+                      score: float,
+                      distance: Optional[float] = None) -> Dict[str, Any]:
         """Format search result for response"""
         
-        distance = self._calculate_distance(
-            vendor.latitude, vendor.longitude,
-            supplier.latitude, supplier.longitude
-        )
+        if distance is None:
+            distance = self._calculate_distance(
+                vendor.latitude, vendor.longitude,
+                supplier.latitude, supplier.longitude
+            )
         
         total_cost = product.price_per_unit * requirements.quantity
         
@@ -0,0 +1,173 @@
+
+import csv
+import io
+import json
+from collections import defaultdict
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..config.database import SessionLocal
+from ..config.settings import settings
+from ..models.product import Product
+from ..models.user import Supplier
+from ..schemas.product import ProductCreate, ProductImportReport, ProductImportRowError
+from .catalog import product_catalog
+from .product_index import product_index
+
+FORMATS = ("csv", "ndjson")
+
+# (line number, parsed row or the reason it could not be parsed)
+Row = Tuple[int, object]
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """csv or ndjson from an upload's file name or content type"""
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+def csv_rows(file: IO[bytes]) -> Iterator[Row]:
+    """Rows of a CSV file with a header line; empty cells are left out so defaults apply"""
+    reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+    while True:
+        try:
+            record = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield reader.line_num, f"Malformed CSV: {e}"
+            continue
+        yield reader.line_num, {key: value.strip() for key, value in record.items()
+                                if key and isinstance(value, str) and value.strip()}
+
+def ndjson_rows(file: IO[bytes]) -> Iterator[Row]:
+    """One JSON object per line; blank lines are skipped"""
+    for line_number, line in enumerate(io.TextIOWrapper(file, encoding="utf-8-sig"), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        yield line_number, record if isinstance(record, dict) else "Expected a JSON object"
+
+def import_products(db: Session,
+                    supplier: Supplier,
+                    rows: Iterator[Row],
+                    batch_size: Optional[int] = None,
+                    max_errors: Optional[int] = None) -> Tuple[ProductImportReport, List[int]]:
+    """Validate rows with ProductCreate and upsert them by (supplier, name) in batches.
+
+    Each batch is written with INSERT ... ON CONFLICT DO UPDATE (one statement
+    per set of provided columns) and its own commit, so only batch_size rows
+    are held at a time and a failing batch does not undo earlier ones.
+    Existing products only get the columns their row provides.
+    Within a batch the last row for a name wins. Returns the report and the
+    ids of every upserted product.
+    """
+    batch_size = batch_size or settings.product_import_batch_size
+    max_errors = settings.product_import_max_errors if max_errors is None else max_errors
+    report = ProductImportReport()
+    product_ids: List[int] = []
+    batch: Dict[str, Tuple[int, ProductCreate]] = {}
+
+    def fail(line: int, errors: List[str], rows: int = 1):
+        report.failed += rows
+        if len(report.errors) < max_errors:
+            report.errors.append(ProductImportRowError(line=line, errors=errors))
+
+    product_catalog.upsert_supplier(supplier)
+    for line, record in rows:
+        if isinstance(record, str):
+            fail(line, [record])
+            continue
+        try:
+            payload = ProductCreate(**record)
+        except ValidationError as e:
+            fail(line, [f"{'.'.join(map(str, error['loc'])) or 'row'}: {error['msg']}" for error in e.errors()])
+            continue
+        batch.pop(payload.name, None)  # Keep file order for the replacing row
+        batch[payload.name] = (line, payload)
+        if len(batch) >= batch_size:
+            _flush(db, supplier.id, batch, report, product_ids, fail)
+            batch = {}
+    if batch:
+        _flush(db, supplier.id, batch, report, product_ids, fail)
+    return report, product_ids
+
+def index_products(product_ids: List[int], batch_size: int = 100):
+    """Re-embed imported products in chunks; meant to run as a background task"""
+    db = SessionLocal()
+    try:
+        for start in range(0, len(product_ids), batch_size):
+            chunk = product_ids[start:start + batch_size]
+            products = db.execute(select(Product).where(Product.id.in_(chunk))).scalars().all()
+            product_index.upsert_products(
+                [(product.id, product_index.product_text(product)) for product in products], batch_size
+            )
+            db.expunge_all()
+    finally:
+        db.close()
+
+def _flush(db: Session, supplier_id: int, batch: Dict[str, Tuple[int, ProductCreate]],
+           report: ProductImportReport, product_ids: List[int], fail):
+    """Upsert one batch, commit it and hand the rows to the catalog"""
+    # Rows that set the same columns share a statement, so an update only
+    # touches the columns its own row provided
+    groups: Dict[frozenset, List[dict]] = defaultdict(list)
+    for _, payload in batch.values():
+        groups[frozenset(payload.dict(exclude_unset=True))].append({**payload.dict(), "supplier_id": supplier_id})
+
+    try:
+        products = []
+        for provided, values in groups.items():
+            stmt = _insert(db)(Product).values(values)
+            update_columns = {column: stmt.excluded[column] for column in provided if column != "name"}
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Product.supplier_id, Product.name],
+                set_={**update_columns, "updated_at": func.now()}
+            ).returning(Product)
+            products += db.scalars(stmt, execution_options={"populate_existing": True}).all()
+        # Detached rows keep the values RETURNING gave them instead of being reloaded one by one
+        for product in products:
+            db.expunge(product)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        lines = [line for line, _ in batch.values()]
+        # One entry for the whole batch; the rows themselves may all be valid
+        reason = f"Batch of {len(lines)} rows (lines {min(lines)}-{max(lines)}) failed: {_error_summary(e)}"
+        fail(min(lines), [reason], len(lines))
+        return
+
+    for product in products:
+        # updated_at is only set by the ON CONFLICT branch
+        if product.updated_at is None:
+            report.created += 1
+        else:
+            report.updated += 1
+        product_ids.append(product.id)
+    product_catalog.upsert_products(products)
+
+def _error_summary(e: Exception, limit: int = 200) -> str:
+    """Exception type and the first line of the driver's message, without the statement or its rows"""
+    message = str(getattr(e, "orig", None) or e).strip().splitlines()
+    summary = type(e).__name__
+    if message:
+        summary += f": {message[0][:limit]}"
+    return summary
+
+def _insert(db: Session):
+    """The dialect's INSERT construct, which provides on_conflict_do_update"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Bulk product import does not support {dialect}")
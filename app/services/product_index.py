@@ -0,0 +1,288 @@
+
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import faiss
+
+from ..models.product import Product
+from ..config.database import SessionLocal
+from ..config.settings import settings
+from .embedding_cache import get_embeddings
+
+class ProductEmbeddingIndex:
+    """Persistent FAISS index of product embeddings keyed by product id.
+
+    Vectors are L2-normalized and stored in an IndexIDMap2 over an inner
+    product index, so search scores are cosine similarities and single
+    products can be replaced or removed in place. The index and a small
+    metadata file (embedding model, per-product text hashes) are written to
+    index_dir at most every save_seconds after a change, and by flush() on
+    shutdown; a crash loses at most that window, which the next sync
+    re-embeds. On startup the persisted index is reloaded
+    and reconciled with the products table, so only rows whose text changed
+    since it was written get re-embedded. The same reconciliation runs again
+    in the background every refresh_seconds, which picks up products written
+    by other workers.
+    """
+
+    def __init__(self, index_dir: str, embedding_model: str, refresh_seconds: int = 300, save_seconds: float = 30.0):
+        self.index_dir = index_dir
+        self.index_path = os.path.join(index_dir, "products.faiss")
+        self.meta_path = os.path.join(index_dir, "products.json")
+        self.embedding_model = embedding_model
+        self.refresh_seconds = refresh_seconds
+        self.save_seconds = save_seconds
+        self._embeddings = None
+        self._index = None
+        self._text_hashes: Dict[int, str] = {}
+        self._pending: Dict[int, str] = {}
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._loader: Optional[threading.Thread] = None
+        self._refresher: Optional[threading.Thread] = None
+        self._synced_at: Optional[float] = None
+        self._dirty = False
+        self._saver: Optional[threading.Thread] = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            self._embeddings = get_embeddings()
+        return self._embeddings
+
+    @staticmethod
+    def product_text(product: Product) -> str:
+        """Text that represents a product for embedding"""
+        return ". ".join(part for part in [product.name, product.category, product.description] if part)
+
+    def start(self):
+        """Load the persisted index, or build it from the catalog, in a background thread"""
+        with self._lock:
+            if self._loader is None:
+                self._loader = threading.Thread(target=self._load_or_build, daemon=True)
+                self._loader.start()
+
+    def search(self, query: str, k: int = 50, min_score: float = 0.6) -> Optional[List[int]]:
+        """Ids of the products most similar to query, or None while the index is unavailable"""
+        if not self.is_ready:
+            self.start()
+            return None
+
+        self._refresh_if_stale()
+        if self._index is None or self._index.ntotal == 0:
+            return []
+        vector = self._normalize([self.embeddings.embed_query(query)])
+        with self._lock:
+            scores, ids = self._index.search(vector, min(k, self._index.ntotal))
+
+        return [int(product_id) for score, product_id in zip(scores[0], ids[0])
+                if product_id != -1 and score >= min_score]
+
+    def upsert_product(self, product_id: int, text: str):
+        """Embed and (re)index one product"""
+        self.upsert_products([(product_id, text)])
+
+    def upsert_products(self, items: Iterable[Tuple[int, str]], batch_size: int = 100):
+        """Embed and (re)index products whose text changed; persisted by the next save"""
+        items = list(items)
+        with self._lock:
+            if not self.is_ready:
+                # Applied once the initial load/build finishes
+                self._pending.update(dict(items))
+                return
+
+        pending = [(product_id, text) for product_id, text in items
+                   if self._text_hashes.get(product_id) != self._hash(text)]
+        for start in range(0, len(pending), batch_size):
+            self._add(pending[start:start + batch_size])
+        if pending:
+            self._mark_dirty()
+
+    def remove_product(self, product_id: int):
+        """Drop a product from the index"""
+        with self._lock:
+            if self._index is not None and self._text_hashes.pop(product_id, None) is not None:
+                self._index.remove_ids(np.array([product_id], dtype=np.int64))
+                self._mark_dirty()
+
+    def flush(self):
+        """Write unsaved changes now"""
+        if self._dirty:
+            self._save()
+
+    def _mark_dirty(self):
+        """Schedule a save; changes within save_seconds share one index write"""
+        with self._lock:
+            self._dirty = True
+            if self._saver is None:
+                self._saver = threading.Thread(target=self._save_later, daemon=True)
+                self._saver.start()
+
+    def _save_later(self):
+        while True:
+            time.sleep(self.save_seconds)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Product index save failed: {e}")
+            with self._lock:
+                if not self._dirty:
+                    self._saver = None
+                    return
+
+    def _refresh_if_stale(self):
+        """Resync with the products table in a background thread once the last sync is old"""
+        synced_at = self._synced_at
+        if synced_at is None or time.monotonic() - synced_at <= self.refresh_seconds:
+            return
+        with self._lock:
+            if self._refresher is None or not self._refresher.is_alive():
+                self._refresher = threading.Thread(target=self._refresh, daemon=True)
+                self._refresher.start()
+
+    def _refresh(self):
+        try:
+            self._sync()
+        except Exception as e:
+            print(f"Product index refresh failed: {e}")
+            self._synced_at = time.monotonic()  # Retry after another interval
+
+    def _load_or_build(self):
+        try:
+            self._load()
+            self._sync()
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._ready.set()
+            self.upsert_products(pending.items())
+        except Exception as e:
+            print(f"Product index unavailable: {e}")
+            with self._lock:
+                self._loader = None  # Allow a later retry
+
+    def _load(self) -> bool:
+        """Read the persisted index if it was built with the current embedding model"""
+        if not (os.path.exists(self.index_path) and os.path.exists(self.meta_path)):
+            return False
+        # Same lock order as _save: thread lock, then file lock
+        with self._lock, self._file_lock():
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            if meta.get("embedding_model") != self.embedding_model:
+                return False  # Vectors from another model are not comparable
+
+            self._index = faiss.read_index(self.index_path)
+            self._text_hashes = {int(k): v for k, v in meta.get("text_hashes", {}).items()}
+        print(f"Loaded product index with {self._index.ntotal} products")
+        return True
+
+    def _sync(self, batch_size: int = 100):
+        """Bring the index in line with the products table, embedding only changed rows"""
+        seen = set()
+        changed = 0
+        # Products indexed while the table is being read are not stale
+        known = set(self._text_hashes)
+        db = SessionLocal()
+        try:
+            batch = []
+            for product in db.query(Product).yield_per(batch_size):
+                seen.add(product.id)
+                text = self.product_text(product)
+                if self._text_hashes.get(product.id) != self._hash(text):
+                    batch.append((product.id, text))
+                if len(batch) == batch_size:
+                    self._add(batch)
+                    changed += len(batch)
+                    batch = []
+            if batch:
+                self._add(batch)
+                changed += len(batch)
+        finally:
+            db.close()
+
+        with self._lock:
+            stale = [product_id for product_id in known if product_id not in seen and product_id in self._text_hashes]
+            if stale and self._index is not None:
+                self._index.remove_ids(np.array(stale, dtype=np.int64))
+            for product_id in stale:
+                del self._text_hashes[product_id]
+
+        if changed or stale:
+            self._save()
+        self._synced_at = time.monotonic()
+        print(f"Product index ready: {len(self._text_hashes)} products, {changed} embedded, {len(stale)} removed")
+
+    def _add(self, items: List[Tuple[int, str]]):
+        vectors = self._normalize(self.embeddings.embed_documents([text for _, text in items]))
+        ids = np.array([product_id for product_id, _ in items], dtype=np.int64)
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vectors.shape[1]))
+            self._index.remove_ids(ids)
+            self._index.add_with_ids(vectors, ids)
+            for product_id, text in items:
+                self._text_hashes[product_id] = self._hash(text)
+
+    def _save(self):
+        with self._lock:
+            if self._index is None:
+                return
+            self._dirty = False
+            # Write to this process's own temp files and rename them under the
+            # file lock, so readers and other workers never see a partial index
+            with self._file_lock():
+                index_tmp, meta_tmp = self._temp_path(".faiss"), self._temp_path(".json")
+                try:
+                    faiss.write_index(self._index, index_tmp)
+                    with open(meta_tmp, "w") as f:
+                        json.dump({"embedding_model": self.embedding_model, "text_hashes": self._text_hashes}, f)
+                    os.replace(index_tmp, self.index_path)
+                    os.replace(meta_tmp, self.meta_path)
+                finally:
+                    for path in (index_tmp, meta_tmp):
+                        if os.path.exists(path):
+                            os.remove(path)
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the index files across processes"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(os.path.join(self.index_dir, "products.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _temp_path(self, suffix: str) -> str:
+        fd, path = tempfile.mkstemp(suffix=suffix, prefix=".products-", dir=self.index_dir)
+        os.close(fd)
+        return path
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        array = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+        faiss.normalize_L2(array)
+        return array
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+product_index = ProductEmbeddingIndex(
+    settings.index_dir,
+    settings.embedding_model,
+    refresh_seconds=settings.product_index_refresh_seconds,
+    save_seconds=settings.product_index_save_seconds
+)
@@ -0,0 +1,70 @@
+
+from collections import defaultdict
+from typing import Dict, List
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.product import Product
+from ..schemas.product import ProductBulkUpdate
+from .catalog import product_catalog
+
+class ProductUpdateError(Exception):
+    """A batch of product changes was rejected; status_code and detail describe why"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+def update_products(db: Session, supplier_id: int, payload: ProductBulkUpdate) -> List[Product]:
+    """Apply many product changes in one transaction, all or nothing.
+
+    Ownership of every id is checked with one query. Changes that set the
+    same columns share one UPDATE with a CASE per column, so the number of
+    statements depends on the distinct column sets, not on the item count.
+    Several items for the same id are merged, later ones winning.
+    """
+    changes: Dict[int, dict] = defaultdict(dict)
+    for item in payload.items:
+        changes[item.id].update(item.dict(exclude_unset=True, exclude={"id"}))
+
+    owned = set(db.execute(
+        select(Product.id).where(Product.id.in_(list(changes)), Product.supplier_id == supplier_id)
+    ).scalars())
+    missing = [product_id for product_id in changes if product_id not in owned]
+    if missing:
+        raise ProductUpdateError(404, f"Products not found or not owned by you: {', '.join(map(str, missing))}")
+
+    groups: Dict[frozenset, List[int]] = defaultdict(list)
+    for product_id, values in changes.items():
+        if values:
+            groups[frozenset(values)].append(product_id)
+
+    try:
+        for columns, product_ids in groups.items():
+            db.execute(
+                update(Product)
+                .where(Product.id.in_(product_ids), Product.supplier_id == supplier_id)
+                .values({
+                    **{column: case({pid: changes[pid][column] for pid in product_ids}, value=Product.id)
+                       for column in columns},
+                    "updated_at": func.now()
+                }),
+                execution_options={"synchronize_session": False}
+            )
+        products = db.execute(select(Product).where(Product.id.in_(list(changes)))).scalars().all()
+        # Detached rows keep their loaded values instead of being reloaded one by one after commit
+        for product in products:
+            db.expunge(product)
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise ProductUpdateError(409, f"Changes conflict with existing products: {e.orig}")
+    except Exception:
+        db.rollback()
+        raise
+
+    product_catalog.upsert_products(products)
+    by_id = {product.id: product for product in products}
+    return [by_id[product_id] for product_id in changes]
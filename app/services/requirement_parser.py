@@ -0,0 +1,335 @@
+
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from ..schemas.chat import RequirementExtraction
+
+# Multi-word entries are matched before single words, so "shimla mirch"
+# wins over "mirch"
+PRODUCTS: Dict[Tuple[str, ...], str] = {
+    ("onion",): "onions", ("onions",): "onions", ("pyaz",): "onions", ("pyaaz",): "onions",
+    ("pyaj",): "onions", ("kanda",): "onions", ("प्याज",): "onions", ("प्याज़",): "onions",
+    ("tomato",): "tomatoes", ("tomatoes",): "tomatoes", ("tamatar",): "tomatoes", ("टमाटर",): "tomatoes",
+    ("potato",): "potatoes", ("potatoes",): "potatoes", ("aloo",): "potatoes", ("alu",): "potatoes",
+    ("batata",): "potatoes", ("आलू",): "potatoes",
+    ("chili",): "green chilies", ("chilli",): "green chilies", ("chilies",): "green chilies",
+    ("chillies",): "green chilies", ("mirch",): "green chilies", ("mirchi",): "green chilies",
+    ("मिर्च",): "green chilies", ("मिर्ची",): "green chilies",
+    ("green", "chili"): "green chilies", ("green", "chilli"): "green chilies",
+    ("green", "chilies"): "green chilies", ("green", "chillies"): "green chilies",
+    ("hari", "mirch"): "green chilies", ("hari", "mirchi"): "green chilies", ("हरी", "मिर्च"): "green chilies",
+    ("ginger",): "ginger", ("adrak",): "ginger", ("अदरक",): "ginger",
+    ("garlic",): "garlic", ("lahsun",): "garlic", ("lehsun",): "garlic", ("लहसुन",): "garlic",
+    ("coriander",): "coriander", ("dhaniya",): "coriander", ("dhania",): "coriander", ("धनिया",): "coriander",
+    ("mint",): "mint", ("pudina",): "mint", ("पुदीना",): "mint",
+    ("lemon",): "lemons", ("lemons",): "lemons", ("nimbu",): "lemons", ("नींबू",): "lemons",
+    ("capsicum",): "capsicum", ("shimla", "mirch"): "capsicum", ("शिमला", "मिर्च"): "capsicum",
+    ("cabbage",): "cabbage", ("patta", "gobhi"): "cabbage", ("band", "gobhi"): "cabbage",
+    ("पत्ता", "गोभी"): "cabbage",
+    ("cauliflower",): "cauliflower", ("gobhi",): "cauliflower", ("gobi",): "cauliflower",
+    ("phool", "gobhi"): "cauliflower", ("गोभी",): "cauliflower", ("फूलगोभी",): "cauliflower",
+    ("carrot",): "carrots", ("carrots",): "carrots", ("gajar",): "carrots", ("गाजर",): "carrots",
+    ("cucumber",): "cucumber", ("kheera",): "cucumber", ("kheere",): "cucumber", ("खीरा",): "cucumber",
+    ("spinach",): "spinach", ("palak",): "spinach", ("पालक",): "spinach",
+    ("peas",): "peas", ("matar",): "peas", ("मटर",): "peas",
+    ("brinjal",): "brinjal", ("baingan",): "brinjal", ("बैंगन",): "brinjal",
+    ("okra",): "okra", ("bhindi",): "okra", ("भिंडी",): "okra",
+    ("paneer",): "paneer", ("पनीर",): "paneer",
+    ("rice",): "rice", ("chawal",): "rice", ("चावल",): "rice",
+    ("atta",): "wheat flour", ("flour",): "wheat flour", ("आटा",): "wheat flour",
+    ("oil",): "oil", ("tel",): "oil", ("तेल",): "oil",
+    ("sugar",): "sugar", ("cheeni",): "sugar", ("chini",): "sugar", ("चीनी",): "sugar",
+    ("salt",): "salt", ("namak",): "salt", ("नमक",): "salt",
+}
+
+# Unit words and the factor converting them to the canonical unit
+UNITS: Dict[str, Tuple[str, float]] = {
+    **{word: ("kg", 1.0) for word in ["kg", "kgs", "kilo", "kilos", "kilogram", "kilograms", "किलो", "केजी"]},
+    **{word: ("kg", 0.001) for word in ["g", "gm", "gms", "gram", "grams", "ग्राम"]},
+    **{word: ("kg", 100.0) for word in ["quintal", "quintals", "क्विंटल"]},
+    **{word: ("kg", 1000.0) for word in ["ton", "tons", "tonne", "tonnes", "टन"]},
+    **{word: ("liter", 1.0) for word in ["l", "ltr", "ltrs", "liter", "liters", "litre", "litres", "लीटर"]},
+    **{word: ("liter", 0.001) for word in ["ml"]},
+    **{word: ("pieces", 1.0) for word in ["piece", "pieces", "pc", "pcs", "nag", "पीस", "नग"]},
+    **{word: ("pieces", 12.0) for word in ["dozen", "darjan", "दर्जन"]},
+    **{word: ("packets", 1.0) for word in ["packet", "packets", "pkt", "पैकेट"]},
+    **{word: ("bunch", 1.0) for word in ["bunch", "bunches", "gaddi", "गड्डी"]},
+}
+
+NUMBER_WORDS: Dict[str, float] = {
+    "aadha": 0.5, "adha": 0.5, "आधा": 0.5, "half": 0.5,
+    "dedh": 1.5, "डेढ़": 1.5, "dhai": 2.5, "dhaai": 2.5, "ढाई": 2.5,
+    "ek": 1, "एक": 1, "one": 1, "do": 2, "दो": 2, "two": 2, "teen": 3, "तीन": 3, "three": 3,
+    "char": 4, "chaar": 4, "चार": 4, "four": 4, "paanch": 5, "panch": 5, "पांच": 5, "पाँच": 5, "five": 5,
+    "chhe": 6, "chhah": 6, "छह": 6, "six": 6, "saat": 7, "सात": 7, "seven": 7,
+    "aath": 8, "आठ": 8, "eight": 8, "nau": 9, "नौ": 9, "nine": 9, "das": 10, "दस": 10, "ten": 10,
+    "barah": 12, "baarah": 12, "बारह": 12, "twelve": 12, "pandrah": 15, "पंद्रह": 15, "fifteen": 15,
+    "bees": 20, "बीस": 20, "twenty": 20, "pachees": 25, "पच्चीस": 25, "tees": 30, "तीस": 30, "thirty": 30,
+    "chalis": 40, "चालीस": 40, "forty": 40, "pachas": 50, "पचास": 50, "fifty": 50,
+}
+
+MULTIPLIERS: Dict[str, float] = {
+    "sau": 100, "सौ": 100, "hundred": 100, "hazar": 1000, "hazaar": 1000, "हजार": 1000,
+    "हज़ार": 1000, "thousand": 1000,
+}
+
+CURRENCY = {"₹", "rs", "rupees", "rupee", "rupaye", "rupay", "रुपये", "रुपए", "रुपया", "inr"}
+BUDGET_MARKERS = {"budget", "बजट", "under", "within", "max", "maximum", "upto"}
+BUDGET_SUFFIXES = {"tak", "तक"}
+PER_UNIT_MARKERS = {"per", "prati", "प्रति", "/", "rate", "bhav", "भाव"}
+RATE_WORDS = {"rate", "bhav", "भाव"}  # "rate 25 per kg": the amount that follows is a unit price
+
+URGENT_WORDS = {"urgent", "urgently", "jaldi", "जल्दी", "turant", "तुरंत", "asap", "immediately",
+                "abhi", "अभी", "emergency", "quickly", "fast"}
+FLEXIBLE_WORDS = {"flexible", "anytime", "whenever"}
+FLEXIBLE_PHRASES = [("no", "hurry"), ("koi", "jaldi", "nahi"), ("jaldi", "nahi"), ("kabhi", "bhi"),
+                    ("जल्दी", "नहीं")]
+NEGATIONS = {"nahi", "nahin", "नहीं", "not", "no"}
+
+QUALITY_WORDS: Dict[str, str] = {
+    **{word: "premium" for word in ["premium", "best", "badhiya", "badiya", "बढ़िया", "बढ़िया", "top",
+                                    "export", "उत्तम", "finest"]},
+    **{word: "good" for word in ["good", "achha", "accha", "achhi", "acchi", "achhe", "acche",
+                                 "अच्छा", "अच्छी", "अच्छे"]},
+    **{word: "basic" for word in ["basic", "sasta", "sasti", "saste", "सस्ता", "सस्ती", "सस्ते",
+                                  "cheap", "cheapest", "lowest"]},
+}
+
+QUESTION_WORDS = {"kya", "क्या", "kaise", "कैसे", "kyu", "kyon", "क्यों", "what", "how", "why", "which",
+                  "when", "kab", "कब", "kaun", "कौन", "kitna", "kitne", "kitni", "कितना", "कितने", "कितनी",
+                  "where", "kahan", "कहाँ", "कहां"}
+
+# Words that carry no requirement information but are expected in an order
+FILLER_WORDS = {
+    "i", "we", "my", "need", "needs", "want", "wants", "would", "like", "please", "pls", "plz",
+    "give", "send", "buy", "order", "get", "for", "of", "the", "a", "an", "some", "and", "to", "is",
+    "chahiye", "chahie", "chaiye", "chaahiye", "चाहिए", "चाहिये", "mujhe", "muje", "मुझे", "hume", "humein",
+    "हमें", "ka", "ki", "ke", "ko", "का", "की", "के", "को", "hai", "hain", "है", "हैं", "se", "से", "aur",
+    "और", "de", "dedo", "dijiye", "dena", "दे", "दो", "दीजिए", "bhejo", "bhej", "भेजो", "lena", "kharidna",
+    "quality", "गुणवत्ता", "quantity", "grade", "fresh", "taaza", "taza", "ताजा", "ताज़ा", "around",
+    "about", "approx", "lagbhag", "लगभग", "only", "sirf", "bas", "liye", "लिए", "mere", "mera", "मेरे",
+    "hoga", "chalega", "चलेगा", "with", "in", "at", "stock", "supply", "mein", "me", "में",
+}
+
+_DEVANAGARI_DIGITS = str.maketrans("०१२३४५६७८९", "0123456789")
+# "/" is kept as a token so "25/kg" reads as a rate
+_SEPARATORS = re.compile(r"[\s!-\-:-@\[-`{-~।]+")
+_NUMBER = re.compile(r"^\d+(?:\.\d+)?$")
+
+class RequirementParser:
+    """Deterministic extractor for common Hindi, Hinglish and English orders.
+
+    Recognizes product names, quantities (digits or number words, with
+    unit conversion), budgets, urgency and quality preference. The
+    confidence score reflects whether a product and quantity were found
+    and how much of the message was understood, so callers can decide
+    when the LLM is needed.
+    """
+
+    def parse(self, message: str) -> RequirementExtraction:
+        tokens = self._tokenize(message)
+        recognized = [False] * len(tokens)
+        products: List[str] = []
+        quantity: Optional[Tuple[float, str]] = None
+        bare_numbers: List[Tuple[float, int, int]] = []
+        budget: Optional[float] = None
+        budget_per_unit = False
+        budget_unit: Optional[Tuple[str, float]] = None
+        urgency = "normal"
+        quality = "good"
+
+        i = 0
+        while i < len(tokens):
+            phrase = self._match_phrase(tokens, i, FLEXIBLE_PHRASES)
+            if phrase:
+                urgency = "flexible"
+                self._mark(recognized, i, phrase)
+                i += phrase
+                continue
+
+            product, length = self._match_product(tokens, i)
+            if product:
+                if product not in products:
+                    products.append(product)
+                self._mark(recognized, i, length)
+                i += length
+                continue
+
+            number = self._parse_number(tokens, i)
+            if number:
+                value, end, is_word = number
+                before = tokens[max(0, i - 2):i]
+                after = tokens[end] if end < len(tokens) else None
+
+                has_currency = after in CURRENCY or (i > 0 and tokens[i - 1] in CURRENCY)
+                after_rate_word = i > 0 and tokens[i - 1] in RATE_WORDS
+                is_budget = (
+                    has_currency or after in BUDGET_SUFFIXES or after_rate_word
+                    # "under 20 kg" is a quantity
+                    or (any(token in BUDGET_MARKERS for token in before) and after not in UNITS)
+                )
+                if is_budget:
+                    budget = value
+                    self._mark(recognized, i, end - i)
+                    if after_rate_word:
+                        recognized[i - 1] = True
+                    if after in CURRENCY or after in BUDGET_SUFFIXES:
+                        recognized[end] = True
+                        end += 1
+                    # "30 rupaye per kilo", "rs 25/kg" and "20 rupaye kilo" are
+                    # unit prices, not totals
+                    has_marker = end < len(tokens) and tokens[end] in PER_UNIT_MARKERS
+                    if has_marker:
+                        recognized[end] = True
+                        end += 1
+                    if end < len(tokens) and tokens[end] in UNITS and (has_marker or has_currency or after_rate_word):
+                        budget_unit = UNITS[tokens[end]]
+                        recognized[end] = True
+                        end += 1
+                    budget_per_unit = has_marker or after_rate_word or budget_unit is not None
+                    i = end
+                    continue
+
+                if after in UNITS:
+                    if quantity is None:
+                        unit, factor = UNITS[after]
+                        quantity = (value * factor, unit)
+                    self._mark(recognized, i, end - i + 1)
+                    i = end + 1
+                    continue
+
+                if not is_word or (after is not None and self._match_product(tokens, end)[0]):
+                    bare_numbers.append((value, i, end))
+                    i = end
+                    continue
+
+            token = tokens[i]
+            if token in URGENT_WORDS:
+                negated = i + 1 < len(tokens) and tokens[i + 1] in NEGATIONS
+                urgency = "flexible" if negated else "urgent"
+                recognized[i] = True
+            elif token in FLEXIBLE_WORDS:
+                urgency = "flexible"
+                recognized[i] = True
+            elif token in QUALITY_WORDS:
+                quality = QUALITY_WORDS[token]
+                recognized[i] = True
+            elif token in FILLER_WORDS or token in CURRENCY or token in BUDGET_MARKERS or token in BUDGET_SUFFIXES \
+                    or token in NUMBER_WORDS:
+                recognized[i] = True
+            i += 1
+
+        has_bare_quantity = False
+        if quantity is not None:
+            quantity_value, unit = quantity
+        elif bare_numbers:
+            has_bare_quantity = True
+            quantity_value, start, end = bare_numbers.pop(0)
+            unit = "kg"
+            self._mark(recognized, start, end - start)
+        else:
+            quantity_value, unit = 1.0, "kg"
+
+        has_quantity = quantity is not None or has_bare_quantity
+        valid_quantity = quantity_value > 0
+        if not valid_quantity:
+            quantity_value = 1.0  # Placeholder; the low confidence sends the message to the LLM
+        if budget is not None and budget_per_unit:
+            if has_quantity and valid_quantity and (budget_unit is None or budget_unit[0] == unit):
+                budget = round(budget / (budget_unit[1] if budget_unit else 1.0) * quantity_value, 2)
+            else:
+                budget = None  # A unit price without a quantity in the same unit gives no total
+
+        coverage = sum(recognized) / len(tokens) if tokens else 0.0
+        confidence = 0.2 + 0.2 * coverage
+        if products:
+            confidence += 0.35
+        if quantity is not None:
+            confidence += 0.25
+        elif has_bare_quantity:
+            confidence += 0.1
+        unrecognized = len(tokens) - sum(recognized)
+        if unrecognized:
+            confidence = min(confidence, 0.9 - 0.1 * unrecognized)  # Words we could not read
+        if bare_numbers:
+            confidence = min(confidence, 0.6)  # Numbers we could not place
+        if not valid_quantity:
+            confidence = min(confidence, 0.3)
+        if len(products) > 1:
+            confidence = min(confidence, 0.5)  # Several items: leave it to the LLM
+        if self._is_question(message, tokens):
+            confidence = min(confidence, 0.4)  # A question, not an order
+
+        return RequirementExtraction(
+            product_name=products[0] if products else "vegetables",
+            quantity=quantity_value,
+            unit=unit,
+            budget=budget,
+            urgency=urgency,
+            quality_preference=quality,
+            confidence_score=round(min(confidence, 0.95), 2)
+        )
+
+    def is_question(self, message: str) -> bool:
+        """Whether a message asks something rather than placing an order"""
+        return self._is_question(message, self._tokenize(message))
+
+    @staticmethod
+    def _is_question(message: str, tokens: List[str]) -> bool:
+        return "?" in message or any(token in QUESTION_WORDS for token in tokens)
+
+    def _tokenize(self, message: str) -> List[str]:
+        text = unicodedata.normalize("NFKC", message).lower().translate(_DEVANAGARI_DIGITS)
+        text = re.sub(r"(\d),(\d{3})", r"\1\2", text)
+        text = text.replace("₹", " ₹ ").replace("/", " / ")
+        # Split "10kg" / "rs300" into number and word
+        text = re.sub(r"(\d)([^\d\s.,])", r"\1 \2", text)
+        text = re.sub(r"([^\d\s.,₹])(\d)", r"\1 \2", text)
+
+        tokens = []
+        for token in _SEPARATORS.split(text):
+            token = token.strip(".,")
+            if token:
+                tokens.append(token)
+        return tokens
+
+    def _parse_number(self, tokens: List[str], i: int) -> Optional[Tuple[float, int, bool]]:
+        token = tokens[i]
+        if _NUMBER.match(token):
+            value, is_word = float(token), False
+        elif token in NUMBER_WORDS:
+            value, is_word = float(NUMBER_WORDS[token]), True
+        elif token in MULTIPLIERS:
+            value, is_word = 1.0, True
+            i -= 1  # "sau rupaye": the multiplier is the number
+        else:
+            return None
+
+        end = i + 1
+        while end < len(tokens) and tokens[end] in MULTIPLIERS:
+            value *= MULTIPLIERS[tokens[end]]
+            is_word = False  # "do sau" is unambiguous
+            end += 1
+        return value, end, is_word
+
+    def _match_product(self, tokens: List[str], i: int) -> Tuple[Optional[str], int]:
+        for length in (2, 1):
+            key = tuple(tokens[i:i + length])
+            if len(key) == length and key in PRODUCTS:
+                return PRODUCTS[key], length
+        return None, 0
+
+    @staticmethod
+    def _match_phrase(tokens: List[str], i: int, phrases: List[Tuple[str, ...]]) -> int:
+        for phrase in phrases:
+            if tuple(tokens[i:i + len(phrase)]) == phrase:
+                return len(phrase)
+        return 0
+
+    @staticmethod
+    def _mark(recognized: List[bool], start: int, length: int):
+        for j in range(start, min(start + length, len(recognized))):
+            recognized[j] = True
+
+requirement_parser = RequirementParser()
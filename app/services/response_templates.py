@@ -0,0 +1,81 @@
+
+from typing import Dict, Optional
+
+INTENTS = ["found_suppliers", "cheapest_option", "out_of_budget", "clarification_needed", "no_results"]
+
+DEFAULT_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "hindi": {
+        "found_suppliers": (
+            "मैंने आपके लिए {count} सप्लायर ढूंढे हैं जो {quantity} {unit} {product_name} दे सकते हैं। "
+            "सबसे किफायती {best_supplier} है: ₹{best_price}/{unit_type}, कुल ₹{best_total}, {best_distance} km दूर।"
+        ),
+        "cheapest_option": (
+            "सबसे सस्ता विकल्प {best_supplier} है: ₹{best_price}/{unit_type}, "
+            "{quantity} {unit} के लिए कुल ₹{best_total} ({best_distance} km दूर)। कुल {count} सप्लायर मिले हैं।"
+        ),
+        "out_of_budget": (
+            "₹{budget} के बजट में {product_name} नहीं मिला। सबसे कम कीमत {best_supplier} की है: "
+            "₹{best_price}/{unit_type}, {quantity} {unit} के लिए कुल ₹{best_total}। क्या आप बजट बढ़ाना चाहेंगे?"
+        ),
+        "clarification_needed": (
+            "आपको कौन सा सामान और कितनी मात्रा चाहिए? जैसे: \"10 किलो प्याज चाहिए बजट 300\""
+        ),
+        "no_results": "मुझे आपकी आवश्यकता के लिए कोई सप्लायर नहीं मिला। कृपया बजट बढ़ाएं या पास के क्षेत्र देखें।",
+    },
+    "english": {
+        "found_suppliers": (
+            "I found {count} suppliers who can deliver {quantity} {unit} of {product_name}. "
+            "The best value is {best_supplier}: ₹{best_price}/{unit_type}, ₹{best_total} in total, {best_distance} km away."
+        ),
+        "cheapest_option": (
+            "The cheapest option is {best_supplier}: ₹{best_price}/{unit_type}, "
+            "₹{best_total} for {quantity} {unit} ({best_distance} km away). {count} suppliers found in total."
+        ),
+        "out_of_budget": (
+            "I couldn't find {product_name} within your ₹{budget} budget. The lowest price is from {best_supplier}: "
+            "₹{best_price}/{unit_type}, ₹{best_total} for {quantity} {unit}. Would you like to increase your budget?"
+        ),
+        "clarification_needed": (
+            "Which item do you need, and how much? For example: \"Need 5kg tomatoes, budget 200\""
+        ),
+        "no_results": "I couldn't find any suppliers for your requirement. Please try increasing your budget or check nearby areas.",
+    },
+}
+
+class TemplateValues(dict):
+    """Leaves unknown placeholders untouched"""
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+class TemplateRegistry:
+    """Reply templates per language and intent.
+
+    Templates are str.format strings. Languages or intents can be added or
+    overridden with register(); lookups for a language without a template
+    fall back to the default language.
+    """
+
+    def __init__(self, templates: Optional[Dict[str, Dict[str, str]]] = None, default_language: str = "english"):
+        self.default_language = default_language
+        self._templates: Dict[str, Dict[str, str]] = {}
+        for language, intents in (templates or {}).items():
+            for intent, template in intents.items():
+                self.register(language, intent, template)
+
+    def register(self, language: str, intent: str, template: str):
+        self._templates.setdefault(language, {})[intent] = template
+
+    def get(self, intent: str, language: str) -> Optional[str]:
+        template = self._templates.get(language, {}).get(intent)
+        if template is None:
+            template = self._templates.get(self.default_language, {}).get(intent)
+        return template
+
+    def render(self, intent: str, language: str, **values) -> Optional[str]:
+        """Filled template for an intent, or None if no template exists"""
+        template = self.get(intent, language)
+        if template is None:
+            return None
+        return template.format_map(TemplateValues(values))
+
+response_templates = TemplateRegistry(DEFAULT_TEMPLATES)
@@ -0,0 +1,65 @@
+
+from typing import Any, Dict
+from celery import Celery
+
+from ..config.database import SessionLocal
+from ..config.settings import settings
+from ..models.chat import ChatMessage
+from .chat_history import save_bot_message, response_from_message, load_history
+
+# Start a worker with: celery -A app.services.tasks worker
+celery_app = Celery(
+    "vendorgpt",
+    broker=settings.celery_broker_url or settings.redis_url,
+    backend=settings.celery_result_backend or settings.redis_url
+)
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    result_expires=settings.chat_job_result_expires_seconds,
+    # Eager mode runs tasks in-process, e.g. with memory:// and cache+memory:// for local testing
+    task_always_eager=settings.celery_task_always_eager,
+    task_store_eager_result=True,
+    # A turn is only acknowledged once its reply is saved, and workers take one at a time
+    task_acks_late=True,
+    worker_prefetch_multiplier=1
+)
+
+def chat_task_id(message_id: int) -> str:
+    """Task id for a user message, so its job can be looked up by message id"""
+    return f"chat-message-{message_id}"
+
+@celery_app.task(name="chat.process_message", bind=True, max_retries=2, default_retry_delay=5)
+def process_chat_message(self, message_id: int, language: str) -> Dict[str, Any]:
+    """Generate and store the bot reply to a user ChatMessage"""
+    from .ai_agent import get_agent
+
+    db = SessionLocal()
+    try:
+        existing = db.query(ChatMessage).filter(ChatMessage.reply_to_id == message_id).first()
+        if existing is not None:
+            # Redelivered after the reply was saved
+            return response_from_message(existing).dict()
+
+        user_message = db.query(ChatMessage).filter(ChatMessage.id == message_id).first()
+        if user_message is None:
+            raise ValueError(f"Chat message {message_id} not found")
+
+        ai_response = get_agent().generate_response(
+            message=user_message.message_content,
+            vendor_id=user_message.session.vendor_id,
+            language=language,
+            db=db,
+            history=load_history(db, user_message.session_id, before_id=message_id)
+        )
+        save_bot_message(db, user_message.session_id, ai_response, reply_to_id=message_id)
+        return ai_response.dict()
+    except ValueError:
+        raise
+    except Exception as e:
+        db.rollback()
+        print(f"Chat job {message_id} failed: {e}")
+        raise self.retry(exc=e)
+    finally:
+        db.close()
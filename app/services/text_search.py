@@ -0,0 +1,69 @@
+
+from sqlalchemy import func, literal_column, or_
+from sqlalchemy.orm import Session
+
+from ..models.product import Product
+
+# pg_trgm's default similarity_threshold, used for the `%` operator on Postgres
+SIMILARITY_THRESHOLD = 0.3
+
+def dialect_name(db: Session) -> str:
+    """Name of the database dialect behind a session (sync or async)"""
+    return db.get_bind().dialect.name
+
+def contains(column, term: str):
+    """Case-insensitive substring match, served by the trigram GIN indexes on Postgres"""
+    return column.ilike(f"%{term}%")
+
+def search_document():
+    """tsvector over name, category and description; must match ix_products_search_tsv"""
+    return func.to_tsvector(
+        literal_column("'simple'"),
+        func.coalesce(Product.name, literal_column("''"))
+        .concat(literal_column("' '"))
+        .concat(func.coalesce(Product.category, literal_column("''")))
+        .concat(literal_column("' '"))
+        .concat(func.coalesce(Product.description, literal_column("''")))
+    )
+
+def product_search_condition(term: str, dialect: str):
+    """Rows whose name, category or description match a search term"""
+    substring = or_(
+        contains(Product.name, term),
+        contains(Product.category, term),
+        contains(Product.description, term)
+    )
+
+    if dialect == "postgresql":
+        return or_(
+            substring,
+            Product.name.op("%")(term),
+            search_document().op("@@")(func.plainto_tsquery(literal_column("'simple'"), term))
+        )
+
+    # SQLite fallback: similarity() is registered per connection in config.database
+    return or_(substring, func.similarity(Product.name, term) >= SIMILARITY_THRESHOLD)
+
+def product_relevance(term: str, dialect: str):
+    """Relevance score for ranking search results, higher is better.
+
+    Name matches outrank category matches, which outrank description mentions.
+    """
+    name_score = func.word_similarity(term, Product.name)
+    category_score = func.word_similarity(term, func.coalesce(Product.category, "")) * 0.8
+    description_score = func.word_similarity(term, func.coalesce(Product.description, "")) * 0.5
+
+    if dialect == "postgresql":
+        text_rank = func.ts_rank(
+            search_document(), func.plainto_tsquery(literal_column("'simple'"), term)
+        )
+        return func.greatest(name_score, category_score, description_score, text_rank)
+
+    return func.max(name_score, category_score, description_score)
+
+def search_products(query, term: str, dialect: str):
+    """Filter a Product query or select() by a search term, yielding (Product, relevance) best first"""
+    relevance = product_relevance(term, dialect).label("relevance")
+    return query.add_columns(relevance).filter(
+        product_search_condition(term, dialect)
+    ).order_by(relevance.desc(), Product.id)
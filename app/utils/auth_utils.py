@@ -3,12 +3,13 @@ from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import firebase_admin
 from firebase_admin import credentials, auth as firebase_auth
 import os
 
-from ..config.database import get_db
+from ..config.database import get_async_db
 from ..config.settings import settings
 from ..models.user import Vendor, Supplier
 
@@ -79,12 +80,13 @@ def get_current_user_firebase_uid(
                 detail="Could not validate credentials"
             )
 
-def get_current_vendor(
-    db: Session = Depends(get_db),
+async def get_current_vendor(
+    db: AsyncSession = Depends(get_async_db),
     firebase_uid: str = Depends(get_current_user_firebase_uid)
 ) -> Vendor:
     """Get current vendor from database"""
-    vendor = db.query(Vendor).filter(Vendor.firebase_uid == firebase_uid).first()
+    result = await db.execute(select(Vendor).where(Vendor.firebase_uid == firebase_uid))
+    vendor = result.scalars().first()
     if vendor is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -92,12 +94,13 @@ def get_current_vendor(
         )
     return vendor
 
-def get_current_supplier(
-    db: Session = Depends(get_db),
+async def get_current_supplier(
+    db: AsyncSession = Depends(get_async_db),
     firebase_uid: str = Depends(get_current_user_firebase_uid)
 ) -> Supplier:
     """Get current supplier from database"""
-    supplier = db.query(Supplier).filter(Supplier.firebase_uid == firebase_uid).first()
+    result = await db.execute(select(Supplier).where(Supplier.firebase_uid == firebase_uid))
+    supplier = result.scalars().first()
     if supplier is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -105,16 +108,18 @@ def get_current_supplier(
         )
     return supplier
 
-def get_current_user_type(
-    db: Session = Depends(get_db),
+async def get_current_user_type(
+    db: AsyncSession = Depends(get_async_db),
     firebase_uid: str = Depends(get_current_user_firebase_uid)
 ) -> dict:
     """Get current user type (vendor or supplier)"""
-    vendor = db.query(Vendor).filter(Vendor.firebase_uid == firebase_uid).first()
+    result = await db.execute(select(Vendor).where(Vendor.firebase_uid == firebase_uid))
+    vendor = result.scalars().first()
     if vendor:
         return {"type": "vendor", "user": vendor}
     
-    supplier = db.query(Supplier).filter(Supplier.firebase_uid == firebase_uid).first()
+    result = await db.execute(select(Supplier).where(Supplier.firebase_uid == firebase_uid))
+    supplier = result.scalars().first()
     if supplier:
         return {"type": "supplier", "user": supplier}
     
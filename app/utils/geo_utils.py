@@ -0,0 +1,85 @@
+
+import math
+from typing import Iterator, Optional, Tuple
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+DEFAULT_DISTANCE_KM = 5.0  # Used when either side has no coordinates
+
+def has_coordinates(latitude: Optional[float], longitude: Optional[float]) -> bool:
+    """Mirror the matchers' `all([lat, lon])` check (0.0 counts as missing)"""
+    return bool(latitude) and bool(longitude)
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calculate distance between two coordinates using Haversine formula"""
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
+    c = 2 * math.asin(math.sqrt(a))
+
+    return c * EARTH_RADIUS_KM
+
+def haversine_km_array(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Vectorized Haversine distance from one point to arrays of points"""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat/2)**2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    c = 2 * np.arcsin(np.sqrt(a))
+
+    return c * EARTH_RADIUS_KM
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, Optional[float], Optional[float]]:
+    """Return (min_lat, max_lat, min_lon, max_lon) enclosing a search circle.
+
+    The longitude bounds are None when the box would wrap around the
+    antimeridian or a pole, in which case only latitude can be bounded.
+    """
+    lat_span = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = latitude - lat_span, latitude + lat_span
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), None, None
+
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    lon_span = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    min_lon, max_lon = longitude - lon_span, longitude + lon_span
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, None, None
+
+    return min_lat, max_lat, min_lon, max_lon
+
+def grid_cell(latitude: float, longitude: float, cell_size_deg: float) -> Tuple[int, int]:
+    """Return the (row, col) grid cell containing a coordinate"""
+    columns = int(round(360 / cell_size_deg))
+    row = math.floor((latitude + 90) / cell_size_deg)
+    col = math.floor((longitude + 180) / cell_size_deg) % columns
+    return row, col
+
+def cells_within(latitude: float,
+                 longitude: float,
+                 radius_km: float,
+                 cell_size_deg: float) -> Iterator[Tuple[int, int]]:
+    """Yield every grid cell that may hold a point within radius_km"""
+    lat_span = radius_km / KM_PER_DEGREE_LAT
+    # Longitude degrees shrink towards the poles; clamp to avoid blowing up
+    cos_lat = max(math.cos(math.radians(min(abs(latitude) + lat_span, 89.9))), 1e-6)
+    lon_span = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180.0)
+
+    columns = int(round(360 / cell_size_deg))
+    min_row = math.floor((max(latitude - lat_span, -90) + 90) / cell_size_deg)
+    max_row = math.floor((min(latitude + lat_span, 90) + 90) / cell_size_deg)
+    min_col = math.floor((longitude - lon_span + 180) / cell_size_deg)
+    max_col = math.floor((longitude + lon_span + 180) / cell_size_deg)
+
+    seen_cols = set()
+    for col in range(min_col, max_col + 1):
+        seen_cols.add(col % columns)
+
+    for row in range(min_row, max_row + 1):
+        for col in seen_cols:
+            yield row, col
@@ -0,0 +1,61 @@
+
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, Response
+from sqlalchemy import String, literal, tuple_
+
+from ..config.settings import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def page_size(limit: Optional[int]) -> int:
+    """Requested page size, defaulted and capped by settings"""
+    return min(max(limit or settings.page_size_default, 1), settings.page_size_max)
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor for the row a page ended on"""
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+
+def keyset_page(query, model, cursor: Optional[str], limit: int, dialect: str, ascending: bool = False):
+    """Order query by (created_at, id) and keep the rows after cursor.
+
+    One extra row is fetched so split_page can tell whether another page
+    exists. The (created_at, id) row comparison is an index range scan on
+    the composite indexes that end in those two columns.
+    """
+    key = tuple_(model.created_at, model.id)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        if dialect == "sqlite":
+            # SQLite compares the stored text; bind it in CURRENT_TIMESTAMP's format
+            created_at = literal(created_at.strftime("%Y-%m-%d %H:%M:%S.%f" if created_at.microsecond
+                                                     else "%Y-%m-%d %H:%M:%S"), String)
+        after = tuple_(created_at, row_id)
+        query = query.where(key > after if ascending else key < after)
+    if ascending:
+        query = query.order_by(model.created_at, model.id)
+    else:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    return query.limit(limit + 1)
+
+def split_page(rows: List, limit: int) -> Tuple[List, Optional[str]]:
+    """The page's rows and the cursor of the next page, if there is one"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+def set_next_cursor(response: Response, cursor: Optional[str]):
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
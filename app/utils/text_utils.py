@@ -0,0 +1,53 @@
+
+import re
+from typing import List, Optional, Set
+
+# Split on whitespace and ASCII punctuation only, so Devanagari vowel signs
+# stay attached to their word
+_WORD_SEPARATORS = re.compile(r"[\s!-/:-@\[-`{-~]+")
+
+def words(text: Optional[str]) -> List[str]:
+    """Lowercase words of a text, pg_trgm style"""
+    if not text:
+        return []
+    return [word for word in _WORD_SEPARATORS.split(text.lower()) if word]
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    """Trigram set of a text, padding each word like pg_trgm does"""
+    result = set()
+    for word in words(text):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            result.add(padded[i:i + 3])
+    return result
+
+def similarity(a: Optional[str], b: Optional[str]) -> float:
+    """Trigram similarity in [0, 1], equivalent to pg_trgm's similarity()"""
+    left, right = trigrams(a), trigrams(b)
+    if not left or not right:
+        return 0.0
+    shared = len(left & right)
+    return shared / (len(left) + len(right) - shared)
+
+def word_similarity(needle: Optional[str], haystack: Optional[str]) -> float:
+    """Best similarity between needle and any run of words in haystack.
+
+    Approximates pg_trgm's word_similarity() for ranking longer fields such
+    as descriptions, where whole-field similarity is diluted.
+    """
+    needle_words = words(needle)
+    haystack_words = words(haystack)
+    if not needle_words or not haystack_words:
+        return 0.0
+
+    width = min(len(needle_words), len(haystack_words))
+    target = " ".join(needle_words)
+    best = 0.0
+    for start in range(len(haystack_words) - width + 1):
+        best = max(best, similarity(target, " ".join(haystack_words[start:start + width])))
+    return best
+
+def register_sqlite_text_functions(dbapi_connection):
+    """Expose similarity/word_similarity to SQLite so search SQL runs unchanged in tests"""
+    dbapi_connection.create_function("similarity", 2, similarity, deterministic=True)
+    dbapi_connection.create_function("word_similarity", 2, word_similarity, deterministic=True)
@@ -0,0 +1,183 @@
+"""Knowledge-base retrieval benchmark: hybrid BM25 + vector vs vector-only.
+
+Builds a synthetic knowledge base of per-product facts (storage, seasonal
+price, quality checks, ...) plus the default knowledge texts, then asks
+English, Hinglish and Hindi questions about one fact each. Reports
+recall@k for the exact fact, the rate at which any chunk about the right
+product is returned, and per-query latency for:
+
+  legacy  vector search with the old "<product> <quantity> <language>" query
+  vector  vector search with the current context query
+  hybrid  HybridRetriever (BM25 + vector, reciprocal-rank fusion)
+
+Run from the repository root (settings are read from .env as usual):
+
+    python -m benchmarks.bench_kb_retrieval
+    python -m benchmarks.bench_kb_retrieval --embeddings hashing --filler 20000 --index-type hnsw
+
+--embeddings configured uses the app's cached embedding model; hashing
+uses a local character n-gram stand-in that needs no network.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.services.hybrid_retriever import HybridRetriever
+from app.services.kb_ingest import INDEX_TYPES, KnowledgeIngestor, text_sources
+from app.services.knowledge_base import DEFAULT_KNOWLEDGE_TEXTS
+from app.services.requirement_parser import PRODUCTS, requirement_parser
+
+FACTS = {
+    "storage": "Storage for {p}: store {p} in a cool, dry and ventilated place; do not stack {p} in closed bags.",
+    "price": "Seasonal price of {p}: {p} are cheapest right after harvest and get costly in the off season.",
+    "quality": "Quality check for {p}: good {p} look firm with even colour; reject {p} with cuts, mould or smell.",
+    "shelf_life": "Shelf life of {p}: {p} stay usable for a few days at room temperature, longer when chilled.",
+    "wholesale": "Wholesale buying of {p}: mandi traders sell {p} by the sack, so split a bulk lot with other vendors.",
+}
+
+QUESTIONS = {
+    "storage": ("how should I store {en} so they last", "{hg} ko kaise store karu", "{hi} कैसे स्टोर करें"),
+    "price": ("when are {en} cheapest", "{hg} sasta kab milta hai", "{hi} सस्ता कब मिलता है"),
+    "quality": ("how do I check the quality of {en}", "{hg} ki quality kaise check kare", "{hi} की क्वालिटी कैसे जांचें"),
+}
+
+class HashingEmbeddings(Embeddings):
+    """Character trigram hashing embeddings; an offline stand-in for the embedding model"""
+
+    def __init__(self, dimension: int = 256):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        padded = f"  {text.lower()}  "
+        for i in range(len(padded) - 2):
+            digest = hashlib.blake2b(padded[i:i + 3].encode("utf-8"), digest_size=4).digest()
+            vector[int.from_bytes(digest, "little") % self.dimension] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+def product_names() -> Dict[str, Tuple[str, str]]:
+    """Catalog name -> (first Hinglish alias, first Devanagari alias)"""
+    names: Dict[str, Tuple[str, str]] = {}
+    aliases: Dict[str, List[str]] = {}
+    for key, name in PRODUCTS.items():
+        aliases.setdefault(name, []).append(" ".join(key))
+    for name, words in aliases.items():
+        latin = [w for w in words if w.isascii() and w not in name]
+        hindi = [w for w in words if not w.isascii()]
+        if latin and hindi:
+            names[name] = (latin[0], hindi[0])
+    return names
+
+def build_corpus(filler: int) -> Tuple[List[str], List[Tuple[str, str, str]]]:
+    """Knowledge texts and (question, expected fact, product) triples"""
+    names = product_names()
+    texts = list(DEFAULT_KNOWLEDGE_TEXTS)
+    cases = []
+    for product, (hinglish, hindi) in names.items():
+        for kind, template in FACTS.items():
+            texts.append(template.format(p=product))
+        for kind, questions in QUESTIONS.items():
+            for question in questions:
+                cases.append((question.format(en=product, hg=hinglish, hi=hindi), FACTS[kind].format(p=product), product))
+    for i in range(filler):
+        product = list(names)[i % len(names)]
+        texts.append(f"Market note {i}: vendor {i % 97} in ward {i % 31} reported steady {product} demand this week.")
+    return texts, cases
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def run(mode: str, vector_store, retriever: HybridRetriever, cases, k: int) -> Dict[str, float]:
+    hits = product_hits = 0
+    latencies = []
+    for question, expected, product in cases:
+        requirements = requirement_parser.parse(question)
+        if mode == "legacy":
+            query = f"{requirements.product_name} {requirements.quantity} english"
+        else:
+            query = " ".join(part for part in (requirements.product_name, question) if part)
+
+        started = time.perf_counter()
+        if mode == "hybrid":
+            docs = retriever.search(query, k=k)
+        else:
+            docs = vector_store.similarity_search(query, k=k)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        contents = [doc.page_content for doc in docs]
+        hits += expected in contents
+        product_hits += any(product in content for content in contents)
+    return {
+        "recall": hits / len(cases),
+        "product_hit_rate": product_hits / len(cases),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": percentile(latencies, 0.95),
+    }
+
+async def run_async(retriever: HybridRetriever, cases, k: int, concurrency: int) -> float:
+    """Queries per second for concurrent HybridRetriever.asearch calls"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(question: str):
+        async with semaphore:
+            await retriever.asearch(question, k=k)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(question) for question, _, _ in cases])
+    return len(cases) / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embeddings", choices=("configured", "hashing"), default="configured")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="flat")
+    parser.add_argument("--filler", type=int, default=2000, help="Unrelated chunks added to the corpus")
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    if args.embeddings == "configured":
+        from app.config.settings import settings
+        from app.services.embedding_cache import get_embeddings
+        embeddings, model = get_embeddings(), settings.embedding_model
+    else:
+        embeddings, model = HashingEmbeddings(), "hashing-256"
+
+    texts, cases = build_corpus(args.filler)
+    with tempfile.TemporaryDirectory() as index_dir:
+        started = time.perf_counter()
+        ingestor = KnowledgeIngestor(embeddings, model, index_dir, index_type=args.index_type, ivf_nlist=64)
+        vector_store = ingestor.sync(text_sources(texts))
+        build_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        retriever = HybridRetriever(vector_store)
+        bm25_seconds = time.perf_counter() - started
+
+        print(f"\n{len(texts)} chunks, {len(cases)} questions, {args.index_type} index, {args.embeddings} embeddings")
+        print(f"index build {build_seconds:.2f}s, BM25 build {bm25_seconds * 1000:.1f}ms\n")
+        print(f"{'mode':<8} {'recall@' + str(args.k):>9} {'product hit':>12} {'p50 ms':>8} {'p95 ms':>8}")
+        for mode in ("legacy", "vector", "hybrid"):
+            result = run(mode, vector_store, retriever, cases, args.k)
+            print(f"{mode:<8} {result['recall']:>9.2f} {result['product_hit_rate']:>12.2f} "
+                  f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}")
+
+        qps = asyncio.run(run_async(retriever, cases, args.k, args.concurrency))
+        print(f"\nhybrid asearch, {args.concurrency} concurrent: {qps:.0f} queries/s")
+
+if __name__ == "__main__":
+    main()
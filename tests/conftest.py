@@ -0,0 +1,11 @@
+import os
+
+# Settings are read at import time; tests never reach these services
+for _name, _value in {
+    "DATABASE_URL": "sqlite://",
+    "GOOGLE_API_KEY": "test",
+    "FIREBASE_CREDENTIALS_PATH": "/nonexistent",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "SECRET_KEY": "test",
+}.items():
+    os.environ.setdefault(_name, _value)
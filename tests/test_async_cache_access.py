@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from app.schemas.chat import RequirementExtraction
+from app.services import ai_agent
+from app.services.ai_agent import VendorGPTAgent
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.extraction_cache import ExtractionCache, MemoryExtractionBackend
+
+class LengthEmbeddings(Embeddings):
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [float(len(text)), 0.0]
+
+class ThreadRecordingBackend(MemoryExtractionBackend):
+    """Memory backend that records which threads touched it"""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key, value, ttl):
+        self.threads.append(threading.get_ident())
+        super().set(key, value, ttl)
+
+class Reply:
+    def __init__(self, content):
+        self.content = content
+
+class ExtractingLLM:
+    async def ainvoke(self, messages):
+        return Reply('{"product_name": "onions", "quantity": 10, "unit": "kg", "confidence_score": 0.8}')
+
+def test_aextract_requirements_uses_cache_off_the_loop(monkeypatch):
+    backend = ThreadRecordingBackend()
+    monkeypatch.setattr(ai_agent, "extraction_cache", ExtractionCache(backend))
+    agent = object.__new__(VendorGPTAgent)
+    agent.llm = ExtractingLLM()
+
+    async def extract_twice():
+        loop_thread = threading.get_ident()
+        first = await agent.aextract_requirements("something for the stall", "english")
+        second = await agent.aextract_requirements("something for the stall", "english")
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(extract_twice())
+    assert first == second == RequirementExtraction(product_name="onions", quantity=10, unit="kg", confidence_score=0.8)
+    assert len(backend.threads) == 3  # miss, store, hit
+    assert loop_thread not in backend.threads
+
+def test_async_embeddings_use_disk_cache_off_the_loop(tmp_path):
+    embeddings = CachedEmbeddings(LengthEmbeddings(), "test", str(tmp_path / "embeddings.db"))
+    threads = []
+    for name in ("_lookup", "_store"):
+        method = getattr(embeddings, name)
+
+        def recorded(*args, method=method):
+            threads.append(threading.get_ident())
+            return method(*args)
+        setattr(embeddings, name, recorded)
+
+    async def embed():
+        loop_thread = threading.get_ident()
+        query = await embeddings.aembed_query("onions")
+        documents = await embeddings.aembed_documents(["onions", "tomatoes", "onions"])
+        return loop_thread, query, documents
+
+    loop_thread, query, documents = asyncio.run(embed())
+    assert query == [6.0, 0.0]
+    assert documents == [[6.0, 1.0], [8.0, 1.0], [6.0, 1.0]]
+    assert len(threads) == 4
+    assert loop_thread not in threads
@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config.database import Base
+from app.models import user, product, order, video_call, chat  # Registers every table
+from app.models.chat import ChatMessage, ChatSession
+from app.models.user import Vendor
+from app.schemas.chat import ChatResponse
+from app.services.chat_history import load_history, save_bot_message, save_user_message
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+    engine.dispose()
+
+@pytest.fixture
+def legacy_session(db):
+    """An active session whose bot rows were written with str() instead of JSON"""
+    vendor = Vendor(firebase_uid="legacy-vendor", name="Legacy vendor")
+    db.add(vendor)
+    db.flush()
+    session = ChatSession(vendor_id=vendor.id, session_id="legacy", status="active")
+    db.add(session)
+    db.flush()
+    for i in range(15):
+        db.add(ChatMessage(session_id=session.id, message_type="user",
+                           message_content=f"need onions {i}", is_processed=True))
+        db.add(ChatMessage(session_id=session.id, message_type="bot",
+                           message_content=f"Here are onion suppliers for request {i}",
+                           extracted_requirements=str({"product_name": "onion", "quantity": 10.0}),
+                           suggested_products=str([{"supplier_name": "A", "price_per_unit": 20.0}]),
+                           is_processed=True))
+    db.commit()
+    return session.id
+
+def test_save_bot_message_summarizes_legacy_rows(db, legacy_session):
+    user_message = save_user_message(db, legacy_session, "need tomatoes")
+    reply = ChatResponse(response="Found tomato suppliers",
+                         extracted_requirements={"product_name": "tomato", "quantity": 5.0, "unit": "kg"})
+    save_bot_message(db, legacy_session, reply, user_message.id)
+
+    session = db.query(ChatSession).filter(ChatSession.id == legacy_session).one()
+    assert session.summarized_until_id is not None
+    assert "Bot: Here are onion suppliers for request" in session.summary
+    assert "Vendor: need onions" in session.summary
+
+    history = load_history(db, legacy_session)
+    assert history.summary == session.summary
+    assert history.turns[-1].content == "Found tomato suppliers"
+
+def test_save_bot_message_survives_compaction_failure(db, legacy_session, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("summary failed")
+
+    monkeypatch.setattr("app.services.chat_history.compact_history", broken)
+    user_message = save_user_message(db, legacy_session, "need potatoes")
+    bot_message = save_bot_message(db, legacy_session, ChatResponse(response="Which quantity?"), user_message.id)
+
+    assert bot_message.id is not None
+    assert db.query(ChatMessage).filter(ChatMessage.id == user_message.id).one().is_processed
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.config.migrations import apply_migrations
+from app.models import user, product, order, video_call, chat  # Registers every table
+from app.models.chat import ChatMessage, ChatSession
+
+@pytest.fixture
+def legacy_engine():
+    """Chat tables as they were created before the columns added since"""
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE chat_sessions (id INTEGER PRIMARY KEY, vendor_id INTEGER NOT NULL, "
+            "session_id VARCHAR NOT NULL, status VARCHAR, created_at DATETIME, closed_at DATETIME)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE chat_messages (id INTEGER PRIMARY KEY, session_id INTEGER NOT NULL, "
+            "message_type VARCHAR NOT NULL, message_content TEXT NOT NULL, extracted_requirements TEXT, "
+            "suggested_products TEXT, is_processed BOOLEAN, created_at DATETIME)"
+        ))
+        conn.execute(text(
+            "INSERT INTO chat_messages (id, session_id, message_type, message_content) VALUES (1, 1, 'bot', 'hi')"
+        ))
+    yield engine
+    engine.dispose()
+
+def columns(engine, table):
+    return {column["name"] for column in inspect(engine).get_columns(table)}
+
+def test_apply_migrations_adds_missing_columns(legacy_engine):
+    apply_migrations(legacy_engine)
+    apply_migrations(legacy_engine)  # Already applied, nothing to do
+
+    assert {"generation_mode", "reply_to_id"} <= columns(legacy_engine, "chat_messages")
+    assert {"summary", "summarized_until_id"} <= columns(legacy_engine, "chat_sessions")
+    indexes = {index["name"]: index["column_names"] for index in inspect(legacy_engine).get_indexes("chat_messages")}
+    assert indexes["ix_chat_messages_reply_to_id"] == ["reply_to_id"]
+    foreign_keys = inspect(legacy_engine).get_foreign_keys("chat_messages")
+    assert [(key["constrained_columns"], key["referred_table"]) for key in foreign_keys] == [(["reply_to_id"], "chat_messages")]
+    with legacy_engine.connect() as conn:
+        row = conn.execute(text("SELECT message_content, generation_mode, reply_to_id FROM chat_messages")).one()
+    assert tuple(row) == ("hi", None, None)
+
+def test_models_load_from_migrated_tables(legacy_engine):
+    apply_migrations(legacy_engine)
+    with Session(legacy_engine) as db:
+        assert db.query(ChatMessage).one().reply_to_id is None
+        assert db.query(ChatSession).all() == []
+
+def test_apply_migrations_skips_missing_tables():
+    engine = create_engine("sqlite://")
+    apply_migrations(engine)
+    assert inspect(engine).get_table_names() == []
@@ -0,0 +1,48 @@
+import pytest
+
+from app.services.requirement_parser import requirement_parser
+
+@pytest.mark.parametrize("message, quantity, budget", [
+    ("30 rs/kg onions 10kg", 10.0, 300.0),
+    ("onions 10 kg rs 25/kg", 10.0, 250.0),
+    ("10 kilo pyaz 20 rupaye kilo", 10.0, 200.0),
+    ("pyaz 20 rupaye kilo, 50 kilo chahiye", 50.0, 1000.0),
+    ("30 rupaye per kilo onions 10 kg", 10.0, 300.0),
+    ("onions 10 kg rate 25 per kg", 10.0, 250.0),
+    ("rs 2 per gram onions 1 kg", 1.0, 2000.0),
+])
+def test_unit_price_is_multiplied_by_quantity(message, quantity, budget):
+    parsed = requirement_parser.parse(message)
+    assert parsed.product_name == "onions"
+    assert parsed.quantity == quantity
+    assert parsed.budget == budget
+
+@pytest.mark.parametrize("message, budget", [
+    ("20 kg tamatar 500 rupaye tak", 500.0),
+    ("need 50 kg potatoes under rs 1200 urgent", 1200.0),
+    ("pyaz ₹500 tak 20 kilo", 500.0),
+])
+def test_total_budget_is_kept(message, budget):
+    assert requirement_parser.parse(message).budget == budget
+
+def test_unit_price_without_quantity_leaves_budget_unset():
+    parsed = requirement_parser.parse("pyaz 30 rupaye kilo")
+    assert parsed.budget is None
+    assert parsed.confidence_score < 0.8
+
+def test_unit_price_in_another_unit_leaves_budget_unset():
+    assert requirement_parser.parse("onions 5 dozen 10 rs per kg").budget is None
+
+def test_zero_quantity_is_rejected():
+    parsed = requirement_parser.parse("0 kg pyaz 100 rupaye")
+    assert parsed.quantity > 0
+    assert parsed.confidence_score < 0.8
+
+def test_unrecognized_words_lower_confidence():
+    assert requirement_parser.parse("10 kg onions").confidence_score == 0.95
+    assert requirement_parser.parse("onions 10 kg from azadpur mandi").confidence_score < 0.8
+
+def test_under_with_unit_is_a_quantity():
+    parsed = requirement_parser.parse("under 20 kg onions")
+    assert parsed.quantity == 20.0
+    assert parsed.budget is None